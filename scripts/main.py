@@ -3,14 +3,27 @@
 import sys
 import os
 import argparse
+from functools import partial
+from typing import Any, Dict
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.dao.layer_loader import LayerLoader
+from src.services.import_service import ImportService
+from src.services.spatial_service import SpatialService
 from src.utils.config_util import ConfigUtil
 from src.utils.logger_util import LoggerUtil
 
 
-def run_all_steps():
+def preload_layers(config: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+    readers = {}
+    readers.update(ImportService(config).layer_readers())
+    readers.update(SpatialService(config, use_cache=use_cache).layer_readers())
+    loader = LayerLoader(ConfigUtil.get_batch_config(config).get('load_workers', 5))
+    return loader.load(readers)
+
+
+def run_all_steps(use_cache: bool = True):
     try:
         config = ConfigUtil.load_config()
         logger = LoggerUtil.setup_logger(
@@ -22,6 +35,9 @@ def run_all_steps():
         logger.info("开始执行完整流程")
         logger.info("=" * 80)
         
+        logger.info("预加载线/面图层")
+        preload_layers(config, use_cache=use_cache)
+        
         from scripts.step1_import_data import main as step1
         from scripts.step2_spatial_analysis import main as step2
         from scripts.step3_update_adcd import main as step3
@@ -29,7 +45,7 @@ def run_all_steps():
         
         steps = [
             ("步骤1: 数据导入", step1),
-            ("步骤2: 空间分析", step2),
+            ("步骤2: 空间分析", partial(step2, use_cache=use_cache)),
             ("步骤3: 更新adcd/vecd", step3),
             ("步骤4: 生成编码", step4)
         ]
@@ -69,13 +85,14 @@ def main():
     parser = argparse.ArgumentParser(description='断面数据处理系统')
     parser.add_argument('--all', action='store_true', help='执行完整流程')
     parser.add_argument('--validate-config', action='store_true', help='验证配置文件')
+    parser.add_argument('--no-cache', action='store_true', help='空间分析时不读写空间索引缓存和图层快照缓存')
     
     args = parser.parse_args()
     
     if args.validate_config:
         return validate_config()
     elif args.all:
-        return run_all_steps()
+        return run_all_steps(use_cache=not args.no_cache)
     else:
         parser.print_help()
         return 0
@@ -2,6 +2,7 @@
 
 import sys
 import os
+import argparse
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -10,7 +11,7 @@ from src.utils.config_util import ConfigUtil
 from src.utils.logger_util import LoggerUtil
 
 
-def main():
+def main(use_cache: bool = True):
     try:
         config = ConfigUtil.load_config()
         logger = LoggerUtil.setup_logger(
@@ -21,8 +22,10 @@ def main():
         logger.info("=" * 80)
         logger.info("步骤2: 空间关联分析")
         logger.info("=" * 80)
+        if not use_cache:
+            logger.info("已禁用空间索引缓存和图层快照缓存")
         
-        service = SpatialService(config)
+        service = SpatialService(config, use_cache=use_cache)
         results = service.analyze_all_relationships()
         
         logger.info("=" * 80)
@@ -41,4 +44,7 @@ def main():
 
 
 if __name__ == '__main__':
-    sys.exit(main())
+    parser = argparse.ArgumentParser(description='空间关联分析')
+    parser.add_argument('--no-cache', action='store_true', help='不读写空间索引缓存和图层快照缓存')
+    args = parser.parse_args()
+    sys.exit(main(use_cache=not args.no_cache))
@@ -0,0 +1,286 @@
+import numpy as np
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class LayerGeometry:
+    __slots__ = ('layer', 'index')
+    
+    def __init__(self, layer: 'ColumnarLayer', index: int):
+        self.layer = layer
+        self.index = index
+    
+    @property
+    def shapeType(self) -> int:
+        return self.layer.shape_type
+    
+    @property
+    def bbox(self) -> Tuple[float, float, float, float]:
+        if self.layer.is_empty(self.index):
+            raise AttributeError('空几何没有bbox')
+        return tuple(self.layer.bboxes[self.index].tolist())
+    
+    @property
+    def points(self) -> np.ndarray:
+        return self.layer.points(self.index)
+    
+    @property
+    def parts(self) -> np.ndarray:
+        return self.layer.parts(self.index)
+
+
+class ColumnarLayer:
+    def __init__(
+        self,
+        shape_type: int,
+        coords: np.ndarray,
+        part_offsets: np.ndarray,
+        feature_offsets: np.ndarray,
+        bboxes: np.ndarray,
+        columns: Dict[str, Any]
+    ):
+        self.shape_type = shape_type
+        self.coords = coords
+        self.part_offsets = part_offsets
+        self.feature_offsets = feature_offsets
+        self.bboxes = bboxes
+        self.columns = columns
+        self.source: Optional[str] = None
+        self._geometries: Optional[List[LayerGeometry]] = None
+    
+    def __len__(self) -> int:
+        return len(self.feature_offsets) - 1
+    
+    @property
+    def fields(self) -> List[str]:
+        return list(self.columns.keys())
+    
+    @property
+    def nbytes(self) -> int:
+        total = self.coords.nbytes + self.part_offsets.nbytes
+        total += self.feature_offsets.nbytes + self.bboxes.nbytes
+        for values in self.columns.values():
+            if isinstance(values, np.ndarray):
+                total += values.nbytes
+        return total
+    
+    def _coord_range(self, index: int) -> Tuple[int, int]:
+        first_part = self.feature_offsets[index]
+        last_part = self.feature_offsets[index + 1]
+        return int(self.part_offsets[first_part]), int(self.part_offsets[last_part])
+    
+    def is_empty(self, index: int) -> bool:
+        start, end = self._coord_range(index)
+        return start == end
+    
+    def points(self, index: int) -> np.ndarray:
+        start, end = self._coord_range(index)
+        return self.coords[start:end]
+    
+    def parts(self, index: int) -> np.ndarray:
+        first_part = self.feature_offsets[index]
+        last_part = self.feature_offsets[index + 1]
+        return self.part_offsets[first_part:last_part] - self.part_offsets[first_part]
+    
+    def geometry(self, index: int) -> LayerGeometry:
+        return self.geometries()[index]
+    
+    def geometries(self) -> List[LayerGeometry]:
+        if self._geometries is None:
+            self._geometries = [LayerGeometry(self, i) for i in range(len(self))]
+        return self._geometries
+    
+    def column(self, name: str) -> List[Any]:
+        values = self.columns.get(name)
+        if values is None:
+            return [None] * len(self)
+        if isinstance(values, np.ndarray):
+            return values.tolist()
+        return values
+    
+    def records(self, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        names = list(fields) if fields is not None else self.fields
+        columns = [self.column(name) for name in names]
+        records = []
+        for i, geometry in enumerate(self.geometries()):
+            row_data = {name: values[i] for name, values in zip(names, columns)}
+            row_data['geometry'] = geometry
+            records.append(row_data)
+        return records
+    
+    def slice(self, start: int, end: int) -> 'ColumnarLayer':
+        end = min(end, len(self))
+        first_part = int(self.feature_offsets[start])
+        last_part = int(self.feature_offsets[end])
+        first_coord = int(self.part_offsets[first_part])
+        last_coord = int(self.part_offsets[last_part])
+        
+        columns = {}
+        for name, values in self.columns.items():
+            columns[name] = values[start:end].copy() if isinstance(values, np.ndarray) else values[start:end]
+        
+        return ColumnarLayer(
+            self.shape_type,
+            self.coords[first_coord:last_coord].copy(),
+            self.part_offsets[first_part:last_part + 1] - first_coord,
+            self.feature_offsets[start:end + 1] - first_part,
+            self.bboxes[start:end].copy(),
+            columns
+        )
+    
+    def take(self, indices: Sequence[int]) -> 'ColumnarLayer':
+        indices = np.asarray(indices, dtype=np.int64)
+        part_ids, feature_offsets = self._expand_ranges(
+            self.feature_offsets[indices], self.feature_offsets[indices + 1]
+        )
+        coord_ids, part_offsets = self._expand_ranges(
+            self.part_offsets[part_ids], self.part_offsets[part_ids + 1]
+        )
+        
+        columns = {}
+        for name, values in self.columns.items():
+            if isinstance(values, np.ndarray):
+                columns[name] = values[indices]
+            else:
+                columns[name] = [values[i] for i in indices.tolist()]
+        
+        return ColumnarLayer(
+            self.shape_type,
+            self.coords[coord_ids],
+            part_offsets,
+            feature_offsets,
+            self.bboxes[indices],
+            columns
+        )
+    
+    @staticmethod
+    def _expand_ranges(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        counts = ends - starts
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        ids = np.arange(offsets[-1], dtype=np.int64) - np.repeat(offsets[:-1] - starts, counts)
+        return ids, offsets
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_geometries'] = None
+        return state
+    
+    @staticmethod
+    def concat(layers: Sequence['ColumnarLayer']) -> 'ColumnarLayer':
+        if not layers:
+            return ColumnarLayer.from_shapes(0, [], [], [])
+        
+        coords = [layer.coords for layer in layers]
+        part_offsets = [np.zeros(1, dtype=np.int64)]
+        feature_offsets = [np.zeros(1, dtype=np.int64)]
+        coord_base = 0
+        part_base = 0
+        for layer in layers:
+            part_offsets.append(layer.part_offsets[1:] + coord_base)
+            feature_offsets.append(layer.feature_offsets[1:] + part_base)
+            coord_base += len(layer.coords)
+            part_base += len(layer.part_offsets) - 1
+        
+        columns = {}
+        for name in layers[0].columns:
+            values = [layer.columns.get(name) for layer in layers]
+            if all(isinstance(value, np.ndarray) for value in values):
+                columns[name] = np.concatenate(values)
+            else:
+                merged = []
+                for layer in layers:
+                    merged.extend(layer.column(name))
+                columns[name] = merged
+        
+        return ColumnarLayer(
+            layers[0].shape_type,
+            np.concatenate(coords) if coords else np.empty((0, 2), dtype=np.float64),
+            np.concatenate(part_offsets),
+            np.concatenate(feature_offsets),
+            np.concatenate([layer.bboxes for layer in layers]),
+            columns
+        )
+    
+    @staticmethod
+    def from_shapes(
+        shape_type: int,
+        shapes: Iterable[Any],
+        attributes: Iterable[Sequence[Any]],
+        fields: Sequence[str]
+    ) -> 'ColumnarLayer':
+        coords = array('d')
+        part_offsets = array('q', [0])
+        feature_offsets = array('q', [0])
+        bboxes = array('d')
+        raw_columns: List[List[Any]] = [[] for _ in fields]
+        
+        for shape, values in zip(shapes, attributes):
+            points = shape.points
+            parts = list(getattr(shape, 'parts', None) or ([0] if points else []))
+            base = len(coords) // 2
+            
+            for point in points:
+                coords.append(point[0])
+                coords.append(point[1])
+            for start in parts[1:]:
+                part_offsets.append(base + start)
+            if parts:
+                part_offsets.append(base + len(points))
+            feature_offsets.append(len(part_offsets) - 1)
+            
+            if points:
+                xs = [point[0] for point in points]
+                ys = [point[1] for point in points]
+                bboxes.extend((min(xs), min(ys), max(xs), max(ys)))
+            else:
+                bboxes.extend((np.nan, np.nan, np.nan, np.nan))
+            
+            for column, value in zip(raw_columns, values):
+                column.append(value)
+        
+        columns = {
+            name: ColumnarLayer._pack_column(values)
+            for name, values in zip(fields, raw_columns)
+        }
+        
+        return ColumnarLayer(
+            shape_type,
+            np.frombuffer(coords, dtype=np.float64).reshape(-1, 2),
+            np.frombuffer(part_offsets, dtype=np.int64),
+            np.frombuffer(feature_offsets, dtype=np.int64),
+            np.frombuffer(bboxes, dtype=np.float64).reshape(-1, 4),
+            columns
+        )
+    
+    @staticmethod
+    def from_arrays(
+        shape_type: int,
+        arrays: Dict[str, np.ndarray],
+        attributes: Iterable[Sequence[Any]],
+        fields: Sequence[str]
+    ) -> 'ColumnarLayer':
+        raw_columns: List[List[Any]] = [[] for _ in fields]
+        for values in attributes:
+            for column, value in zip(raw_columns, values):
+                column.append(value)
+        
+        return ColumnarLayer(
+            shape_type,
+            arrays['coords'],
+            arrays['part_offsets'],
+            arrays['feature_offsets'],
+            arrays['bboxes'],
+            {
+                name: ColumnarLayer._pack_column(values)
+                for name, values in zip(fields, raw_columns)
+            }
+        )
+    
+    @staticmethod
+    def _pack_column(values: List[Any]) -> Any:
+        if values and all(type(value) is int for value in values):
+            return np.array(values, dtype=np.int64)
+        if values and all(type(value) is float for value in values):
+            return np.array(values, dtype=np.float64)
+        return values
@@ -1,22 +1,126 @@
+import os
+import shutil
+import tempfile
+import time
+import uuid
 import pymysql
-from typing import Dict, Any, List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import partial
+from typing import Dict, Any, Callable, IO, Iterable, List, Tuple, Optional, Union
 from src.utils.db_util import DBUtil
 from src.utils.logger_util import LoggerUtil
 
 
 class DatabaseDAO:
-    def __init__(self, db_config: Dict[str, Any]):
+    LOCAL_INFILE_ERRORS = (1148, 2068, 3948)
+    UPDATE_MODES = ('executemany', 'join')
+    BULK_LOAD_VARIABLES = {'unique_checks': 0, 'foreign_key_checks': 0}
+    FOREIGN_KEY_INDEX_ERROR = 1553
+    
+    def __init__(self, db_config: Dict[str, Any], update_mode: str = 'executemany', write_workers: int = 1):
+        if update_mode not in self.UPDATE_MODES:
+            raise ValueError(f"不支持的更新方式: {update_mode}")
         self.db_config = db_config
+        self.update_mode = update_mode
+        self.write_workers = write_workers
         self.logger = LoggerUtil.get_logger(self.__class__.__name__)
     
+    @contextmanager
+    def transaction(self):
+        with DBUtil.transaction(self.db_config) as conn:
+            yield conn
+    
+    def _commit(self, conn):
+        if not DBUtil.in_transaction(self.db_config):
+            conn.commit()
+    
+    @contextmanager
+    def bulk_load_session(self, table_name: str, defer_indexes: bool = True):
+        if defer_indexes and DBUtil.in_transaction(self.db_config):
+            self.logger.info(f"当前处于事务中, 不延迟维护 {table_name} 的索引")
+            defer_indexes = False
+        
+        start = time.perf_counter()
+        with DBUtil.session(self.db_config, self.BULK_LOAD_VARIABLES) as conn:
+            self.logger.info(f"{table_name} 进入批量装载会话: unique_checks=0, foreign_key_checks=0")
+            dropped: List[Dict[str, Any]] = []
+            try:
+                if defer_indexes:
+                    self._drop_secondary_indexes(conn, table_name, dropped)
+                yield conn
+            finally:
+                self.logger.info(f"{table_name} 批量装载耗时 {time.perf_counter() - start:.2f} 秒")
+                failed = self._restore_indexes(conn, table_name, dropped)
+        
+        if failed:
+            raise RuntimeError(f"重建索引失败: {table_name} {failed}")
+        self.logger.info(f"{table_name} 批量装载会话结束, 总耗时 {time.perf_counter() - start:.2f} 秒")
+    
+    def _table_indexes(self, cursor, table_name: str) -> List[Dict[str, Any]]:
+        cursor.execute(f"SHOW INDEX FROM {table_name}")
+        names = [column[0] for column in cursor.description]
+        indexes: Dict[str, Dict[str, Any]] = {}
+        for row in cursor.fetchall():
+            item = dict(zip(names, row))
+            index = indexes.setdefault(item['Key_name'], {
+                'name': item['Key_name'],
+                'unique': not int(item['Non_unique']),
+                'type': item['Index_type'],
+                'columns': [],
+                'expression': False
+            })
+            index['expression'] = index['expression'] or item.get('Expression') is not None
+            index['columns'].append((int(item['Seq_in_index']), item['Column_name'], item['Sub_part'], item['Collation']))
+        
+        for index in indexes.values():
+            index['columns'] = [column[1:] for column in sorted(index['columns'])]
+        return list(indexes.values())
+    
+    def _drop_secondary_indexes(self, conn, table_name: str, dropped: List[Dict[str, Any]]):
+        with conn.cursor() as cursor:
+            for index in self._table_indexes(cursor, table_name):
+                if index['name'] == 'PRIMARY':
+                    continue
+                if index['expression']:
+                    self.logger.info(f"保留函数索引 {table_name}.{index['name']}")
+                    continue
+                
+                drop_sql = DBUtil.build_drop_index_sql(table_name, index['name'])
+                try:
+                    cursor.execute(drop_sql)
+                except pymysql.err.MySQLError as e:
+                    if e.args[0] != self.FOREIGN_KEY_INDEX_ERROR:
+                        raise
+                    self.logger.info(f"保留外键所需索引 {table_name}.{index['name']}")
+                    continue
+                
+                dropped.append(index)
+                self.logger.info(f"{drop_sql} (重建语句: {DBUtil.build_add_index_sql(table_name, index)})")
+        
+        self.logger.info(f"{table_name} 延迟维护 {len(dropped)} 个二级索引")
+    
+    def _restore_indexes(self, conn, table_name: str, indexes: List[Dict[str, Any]]) -> List[str]:
+        failed = []
+        for index in indexes:
+            add_sql = DBUtil.build_add_index_sql(table_name, index)
+            start = time.perf_counter()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(add_sql)
+                self.logger.info(f"{add_sql} (耗时 {time.perf_counter() - start:.2f} 秒)")
+            except Exception as e:
+                self.logger.error(f"重建索引失败, 请手动执行: {add_sql}", exc_info=True)
+                failed.append(index['name'])
+        return failed
+    
     def truncate_table(self, table_name: str) -> bool:
         try:
             with DBUtil.get_connection(self.db_config) as conn:
                 cursor = conn.cursor()
-                DBUtil.set_utf8mb4(cursor)
                 
                 cursor.execute(f"TRUNCATE TABLE {table_name}")
-                conn.commit()
+                self._commit(conn)
                 
                 self.logger.info(f"成功清空表: {table_name}")
                 cursor.close()
@@ -31,16 +135,27 @@ class DatabaseDAO:
         table_name: str, 
         columns: List[str], 
         values: List[Tuple],
-        batch_size: int = 1000
+        batch_size: int = 1000,
+        workers: Optional[int] = None
     ) -> int:
         if not values:
             return 0
         
+        shard_count = self._shard_count(workers, len(values), batch_size)
+        if shard_count > 1:
+            size = -(-len(values) // shard_count)
+            shards = [values[i:i + size] for i in range(0, len(values), size)]
+            total_inserted = self._write_shards(
+                table_name, shards,
+                lambda shard: self.batch_insert(table_name, columns, shard, batch_size, workers=1)
+            )
+            if total_inserted != len(values):
+                raise RuntimeError(f"并行插入行数不符: {table_name} 预期 {len(values)} 条, 实际 {total_inserted} 条")
+            return total_inserted
+        
         try:
             with DBUtil.get_connection(self.db_config) as conn:
                 cursor = conn.cursor()
-                DBUtil.set_utf8mb4(cursor)
-                DBUtil.set_timeout(cursor)
                 
                 insert_sql = DBUtil.build_insert_sql(table_name, columns)
                 total_inserted = 0
@@ -51,10 +166,10 @@ class DatabaseDAO:
                     total_inserted += cursor.rowcount
                     
                     if (i + batch_size) % 5000 == 0:
-                        conn.commit()
+                        self._commit(conn)
                         self.logger.info(f"已插入 {total_inserted} 条记录到 {table_name}")
                 
-                conn.commit()
+                self._commit(conn)
                 cursor.close()
                 
                 self.logger.info(f"成功插入 {total_inserted} 条记录到 {table_name}")
@@ -64,36 +179,186 @@ class DatabaseDAO:
             self.logger.error(f"批量插入失败: {table_name}", exc_info=True)
             raise
     
+    def stream_insert(
+        self,
+        table_name: str,
+        columns: List[str],
+        chunks: Iterable[List[Tuple]],
+        batch_size: int = 1000
+    ) -> int:
+        try:
+            with DBUtil.get_connection(self.db_config) as conn:
+                cursor = conn.cursor()
+                
+                insert_sql = DBUtil.build_insert_sql(table_name, columns)
+                total_inserted = 0
+                
+                for chunk_idx, values in enumerate(chunks):
+                    for i in range(0, len(values), batch_size):
+                        batch = values[i:i + batch_size]
+                        cursor.executemany(insert_sql, batch)
+                        total_inserted += cursor.rowcount
+                    
+                    self._commit(conn)
+                    self.logger.info(f"分块 {chunk_idx + 1}: 已插入 {total_inserted} 条记录到 {table_name}")
+                
+                cursor.close()
+                
+                self.logger.info(f"成功插入 {total_inserted} 条记录到 {table_name}")
+                return total_inserted
+                
+        except Exception as e:
+            self.logger.error(f"流式插入失败: {table_name}", exc_info=True)
+            raise
+    
+    def bulk_load(
+        self,
+        table_name: str,
+        columns: List[str],
+        rows: Union[str, IO, Iterable[Tuple]],
+        batch_size: int = 1000
+    ) -> Dict[str, Any]:
+        tmp_path = None
+        try:
+            values = None
+            if isinstance(rows, str):
+                path = rows
+            elif hasattr(rows, 'read'):
+                path = tmp_path = self._copy_to_temp(table_name, rows)
+            else:
+                values = rows
+            
+            with DBUtil.get_connection(self.db_config) as conn:
+                cursor = conn.cursor()
+                
+                mode = 'load_data' if self._local_infile_enabled(cursor) else 'executemany'
+                if mode == 'load_data':
+                    if values is not None:
+                        path = tmp_path = self._write_temp_tsv(table_name, values)
+                        values = None
+                    try:
+                        cursor.execute(DBUtil.build_load_data_sql(table_name, columns), (path,))
+                        total_loaded = cursor.rowcount
+                        warnings = self._report_warnings(cursor, table_name)
+                    except pymysql.err.MySQLError as e:
+                        if e.args[0] not in self.LOCAL_INFILE_ERRORS:
+                            raise
+                        self.logger.warning(f"服务器不允许 LOAD DATA LOCAL INFILE, 改用 executemany: {e.args[1]}")
+                        mode = 'executemany'
+                
+                if mode == 'executemany':
+                    insert_sql = DBUtil.build_insert_sql(table_name, columns)
+                    batches = DBUtil.read_tsv(path, batch_size) if values is None else DBUtil.iter_batches(values, batch_size)
+                    total_loaded = 0
+                    warnings = 0
+                    for batch in batches:
+                        cursor.executemany(insert_sql, batch)
+                        total_loaded += cursor.rowcount
+                        warnings += self._report_warnings(cursor, table_name)
+                
+                self._commit(conn)
+                cursor.close()
+            
+            self.logger.info(
+                f"成功装载 {total_loaded} 条记录到 {table_name} (方式: {mode}, 警告: {warnings})"
+            )
+            return {'rows': total_loaded, 'warnings': warnings, 'mode': mode}
+            
+        except Exception as e:
+            self.logger.error(f"批量装载失败: {table_name}", exc_info=True)
+            raise
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def _local_infile_enabled(self, cursor) -> bool:
+        if not self.db_config.get('local_infile', False):
+            return False
+        
+        cursor.execute("SELECT @@GLOBAL.local_infile")
+        if int(cursor.fetchone()[0]):
+            return True
+        self.logger.warning("服务器未开启 local_infile, 改用 executemany")
+        return False
+    
+    def _write_temp_tsv(self, table_name: str, rows: Iterable[Tuple]) -> str:
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{table_name}_", suffix='.tsv')
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            written = DBUtil.write_tsv(rows, f)
+        self.logger.info(f"已写出 {written} 条记录到临时文件: {tmp_path}")
+        return tmp_path
+    
+    def _copy_to_temp(self, table_name: str, stream: IO) -> str:
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{table_name}_", suffix='.tsv')
+        if isinstance(stream.read(0), bytes):
+            target = os.fdopen(fd, 'wb')
+        else:
+            target = os.fdopen(fd, 'w', encoding='utf-8', newline='')
+        with target:
+            shutil.copyfileobj(stream, target)
+        self.logger.info(f"已复制数据流到临时文件: {tmp_path}")
+        return tmp_path
+    
+    def _report_warnings(self, cursor, table_name: str) -> int:
+        cursor.execute("SHOW COUNT(*) WARNINGS")
+        warnings = cursor.fetchone()[0]
+        if warnings:
+            cursor.execute("SHOW WARNINGS LIMIT 5")
+            for level, code, message in cursor.fetchall():
+                self.logger.warning(f"{table_name} 装载警告 [{level} {code}]: {message}")
+        return warnings
+    
     def batch_update(
         self,
         table_name: str,
         set_columns: List[str],
         where_columns: List[str],
         params: List[Tuple],
-        batch_size: int = 1000
+        batch_size: int = 1000,
+        workers: Optional[int] = None
     ) -> int:
         if not params:
             return 0
         
+        shard_count = self._shard_count(workers, len(params), batch_size)
+        if shard_count > 1 and not self._keys_indexed(table_name, where_columns):
+            self.logger.warning(f"{table_name} 的 {where_columns} 没有索引, 并行更新可能相互死锁, 改为单连接更新")
+            shard_count = 1
+        
+        if shard_count > 1:
+            key_start = len(set_columns)
+            latest = {}
+            for row in params:
+                latest[tuple(row[key_start:])] = row
+            if len(latest) != len(params):
+                self.logger.info(f"合并重复键后待更新 {len(latest)} 条 (原 {len(params)} 条)")
+            
+            expected = self._count_matching(table_name, where_columns, list(latest), batch_size)
+            shards = [[] for _ in range(shard_count)]
+            for key, row in latest.items():
+                shards[hash(key) % shard_count].append(row)
+            total_updated = self._write_shards(
+                table_name, [shard for shard in shards if shard],
+                lambda shard: self.batch_update(table_name, set_columns, where_columns, shard, batch_size, workers=1)
+            )
+            if total_updated != expected:
+                raise RuntimeError(f"并行更新行数不符: {table_name} 预期匹配 {expected} 条, 实际 {total_updated} 条")
+            return total_updated
+        
         try:
             with DBUtil.get_connection(self.db_config) as conn:
                 cursor = conn.cursor()
-                DBUtil.set_utf8mb4(cursor)
-                DBUtil.set_timeout(cursor)
-                
-                update_sql = DBUtil.build_update_sql(table_name, set_columns, where_columns)
-                total_updated = 0
                 
-                for i in range(0, len(params), batch_size):
-                    batch = params[i:i + batch_size]
-                    cursor.executemany(update_sql, batch)
-                    total_updated += cursor.rowcount
-                    
-                    if (i + batch_size) % 5000 == 0:
-                        conn.commit()
-                        self.logger.info(f"已更新 {total_updated} 条记录在 {table_name}")
+                if self.update_mode == 'join':
+                    total_updated = self._join_update(
+                        conn, cursor, table_name, set_columns, where_columns, params, batch_size
+                    )
+                else:
+                    total_updated = self._executemany_update(
+                        conn, cursor, table_name, set_columns, where_columns, params, batch_size
+                    )
                 
-                conn.commit()
+                self._commit(conn)
                 cursor.close()
                 
                 self.logger.info(f"成功更新 {total_updated} 条记录在 {table_name}")
@@ -103,11 +368,147 @@ class DatabaseDAO:
             self.logger.error(f"批量更新失败: {table_name}", exc_info=True)
             raise
     
+    def _keys_indexed(self, table_name: str, where_columns: List[str]) -> bool:
+        with DBUtil.get_connection(self.db_config) as conn:
+            with conn.cursor() as cursor:
+                indexes = self._table_indexes(cursor, table_name)
+        return any(index['columns'][0][0] in where_columns for index in indexes)
+    
+    def _count_matching(self, table_name: str, where_columns: List[str], keys: List[Tuple], batch_size: int) -> int:
+        total = 0
+        with DBUtil.get_connection(self.db_config) as conn:
+            with conn.cursor() as cursor:
+                for i in range(0, len(keys), batch_size):
+                    batch = keys[i:i + batch_size]
+                    cursor.execute(
+                        DBUtil.build_count_keys_sql(table_name, where_columns, len(batch)),
+                        tuple(value for key in batch for value in key)
+                    )
+                    total += cursor.fetchone()[0]
+        return total
+    
+    def _shard_count(self, workers: Optional[int], row_count: int, batch_size: int) -> int:
+        workers = self.write_workers if workers is None else workers
+        if workers <= 1:
+            return 1
+        if DBUtil.in_transaction(self.db_config):
+            self.logger.info("当前处于事务中, 不使用并行写入")
+            return 1
+        
+        pool_size = self.db_config.get('pool_size', 5)
+        if pool_size:
+            if DBUtil.session_variables(self.db_config) is not None:
+                pool_size -= 1
+            workers = min(workers, pool_size)
+        return max(1, min(workers, -(-row_count // max(1, batch_size))))
+    
+    def _write_shards(self, table_name: str, shards: List[List[Tuple]], write: Callable[[List[Tuple]], int]) -> int:
+        self.logger.info(f"并行写入 {table_name}: {len(shards)} 个分片, {sum(len(shard) for shard in shards)} 条记录")
+        variables = DBUtil.session_variables(self.db_config)
+        if variables:
+            write = partial(self._write_in_session, write, variables)
+        counts = [0] * len(shards)
+        with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+            futures = {executor.submit(write, shard): i for i, shard in enumerate(shards)}
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                counts[i] = future.result()
+                self.logger.info(f"{table_name} 分片 {i + 1} 已提交 {counts[i]} 条 ({done}/{len(shards)})")
+        return sum(counts)
+    
+    def _write_in_session(self, write: Callable[[List[Tuple]], int], variables: Dict[str, Any], shard: List[Tuple]) -> int:
+        with DBUtil.session(self.db_config, variables):
+            return write(shard)
+    
+    def _executemany_update(
+        self,
+        conn,
+        cursor,
+        table_name: str,
+        set_columns: List[str],
+        where_columns: List[str],
+        params: List[Tuple],
+        batch_size: int
+    ) -> int:
+        update_sql = DBUtil.build_update_sql(table_name, set_columns, where_columns)
+        total_updated = 0
+        
+        for i in range(0, len(params), batch_size):
+            batch = params[i:i + batch_size]
+            cursor.executemany(update_sql, batch)
+            total_updated += cursor.rowcount
+            
+            if (i + batch_size) % 5000 == 0:
+                self._commit(conn)
+                self.logger.info(f"已更新 {total_updated} 条记录在 {table_name}")
+        
+        return total_updated
+    
+    def _join_update(
+        self,
+        conn,
+        cursor,
+        table_name: str,
+        set_columns: List[str],
+        where_columns: List[str],
+        params: List[Tuple],
+        batch_size: int
+    ) -> int:
+        key_start = len(set_columns)
+        latest = {}
+        for row in params:
+            latest[tuple(row[key_start:])] = row
+        rows = list(latest.values())
+        if len(rows) != len(params):
+            self.logger.info(f"合并重复键后待更新 {len(rows)} 条 (原 {len(params)} 条)")
+        
+        staging_table = f"tmp_update_{uuid.uuid4().hex[:12]}"
+        staging_columns = [f"s{i}" for i in range(len(set_columns))] + [f"w{i}" for i in range(len(where_columns))]
+        cursor.execute(DBUtil.build_staging_table_sql(
+            staging_table,
+            self._column_types(cursor, table_name, set_columns),
+            self._column_types(cursor, table_name, where_columns)
+        ))
+        
+        try:
+            insert_sql = DBUtil.build_insert_sql(staging_table, staging_columns)
+            update_sql = DBUtil.build_join_update_sql(table_name, staging_table, set_columns, where_columns)
+            total_updated = 0
+            
+            for i in range(0, len(rows), batch_size):
+                cursor.executemany(insert_sql, rows[i:i + batch_size])
+                cursor.execute(update_sql)
+                total_updated += cursor.rowcount
+                cursor.execute(f"DELETE FROM {staging_table}")
+                
+                if (i + batch_size) % 5000 == 0:
+                    self._commit(conn)
+                    self.logger.info(f"已更新 {total_updated} 条记录在 {table_name}")
+            
+            return total_updated
+            
+        finally:
+            try:
+                cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {staging_table}")
+            except Exception as e:
+                self.logger.warning(f"删除临时表失败: {staging_table}", exc_info=True)
+    
+    def _column_types(self, cursor, table_name: str, columns: List[str]) -> List[str]:
+        names = list(dict.fromkeys(columns))
+        cursor.execute(DBUtil.build_column_types_sql(len(names)), (table_name, *names))
+        types = {
+            name.lower(): f"{column_type} COLLATE {collation}" if collation else column_type
+            for name, column_type, collation in cursor.fetchall()
+        }
+        missing = [col for col in columns if col.lower() not in types]
+        if missing:
+            raise ValueError(f"表 {table_name} 中不存在字段: {missing}")
+        return [types[col.lower()] for col in columns]
+    
     def execute_query(self, sql: str, params: Tuple = None) -> List[Tuple]:
         try:
             with DBUtil.get_connection(self.db_config) as conn:
                 cursor = conn.cursor()
-                DBUtil.set_utf8mb4(cursor)
                 
                 if params:
                     cursor.execute(sql, params)
@@ -127,7 +528,6 @@ class DatabaseDAO:
         try:
             with DBUtil.get_connection(self.db_config) as conn:
                 cursor = conn.cursor()
-                DBUtil.set_utf8mb4(cursor)
                 
                 if params:
                     cursor.execute(sql, params)
@@ -135,7 +535,7 @@ class DatabaseDAO:
                     cursor.execute(sql)
                 
                 affected_rows = cursor.rowcount
-                conn.commit()
+                self._commit(conn)
                 cursor.close()
                 
                 return affected_rows
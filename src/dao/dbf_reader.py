@@ -0,0 +1,207 @@
+import codecs
+import mmap
+import os
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+import numpy as np
+from src.utils.logger_util import LoggerUtil
+
+
+class DbfField(NamedTuple):
+    name: str
+    field_type: str
+    size: int
+    decimal: int
+    offset: int
+
+
+class DbfReader:
+    DEFAULT_ENCODING = 'utf-8'
+    
+    def __init__(self, dbf_path: str, encoding: Optional[str] = None, encoding_errors: str = 'strict'):
+        base, ext = os.path.splitext(dbf_path)
+        if ext.lower() in ('.shp', '.shx', '.dbf'):
+            dbf_path = base + '.dbf'
+        else:
+            base, dbf_path = dbf_path, dbf_path + '.dbf'
+        
+        self.dbf_path = dbf_path
+        self.encoding = encoding or self.read_cpg(base) or self.DEFAULT_ENCODING
+        self.encoding_errors = encoding_errors
+        self.logger = LoggerUtil.get_logger(self.__class__.__name__)
+        
+        self._file = open(dbf_path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = np.frombuffer(self._map, dtype=np.uint8)
+        
+        self.record_count = int(self.buffer[4:8].view('<u4')[0])
+        self.header_length = int(self.buffer[8:10].view('<u2')[0])
+        self.record_length = int(self.buffer[10:12].view('<u2')[0])
+        self.fields = self._read_fields()
+        
+        available = max(0, (len(self.buffer) - self.header_length) // self.record_length)
+        if available < self.record_count:
+            self.logger.warning(f"DBF记录数与文件大小不符, 按 {available} 条读取: {dbf_path}")
+            self.record_count = available
+        
+        self.records = np.ndarray(
+            shape=(self.record_count,),
+            dtype=self._record_dtype(),
+            buffer=self._map,
+            offset=self.header_length
+        )
+        self.deleted = self.records['_deleted'] != b' '
+    
+    def __enter__(self) -> 'DbfReader':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def __len__(self) -> int:
+        return self.record_count
+    
+    @staticmethod
+    def read_cpg(base_path: str) -> Optional[str]:
+        for ext in ('.cpg', '.CPG'):
+            path = base_path + ext
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='ascii', errors='ignore') as f:
+                name = f.read().strip()
+            for candidate in (name, f"cp{name}"):
+                try:
+                    return codecs.lookup(candidate).name
+                except LookupError:
+                    continue
+        return None
+    
+    @property
+    def field_names(self) -> List[str]:
+        return [field.name for field in self.fields]
+    
+    def close(self):
+        self.records = None
+        self.deleted = None
+        self.buffer = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def _read_fields(self) -> List[DbfField]:
+        fields = []
+        offset = 1
+        position = 32
+        while position + 32 <= self.header_length and self.buffer[position] != 0x0D:
+            raw = self.buffer[position:position + 32].tobytes()
+            name = raw[:11].split(b'\x00')[0].decode(self.encoding, self.encoding_errors).strip()
+            field_type = chr(raw[11]).upper()
+            size = raw[16]
+            decimal = raw[17]
+            fields.append(DbfField(name, field_type, size, decimal, offset))
+            offset += size
+            position += 32
+        return fields
+    
+    def _record_dtype(self) -> np.dtype:
+        names = ['_deleted']
+        formats = ['S1']
+        offsets = [0]
+        for i, field in enumerate(self.fields):
+            names.append(f"f{i}")
+            formats.append(f"S{field.size}")
+            offsets.append(field.offset)
+        return np.dtype({
+            'names': names,
+            'formats': formats,
+            'offsets': offsets,
+            'itemsize': self.record_length
+        })
+    
+    def field(self, name: str) -> DbfField:
+        for field in self.fields:
+            if field.name == name:
+                return field
+        raise KeyError(name)
+    
+    def raw_column(self, name: str) -> np.ndarray:
+        return self.records[f"f{self.fields.index(self.field(name))}"]
+    
+    def column(self, name: str, rows: Optional[np.ndarray] = None) -> Any:
+        field = self.field(name)
+        raw = self.raw_column(name)
+        if rows is not None:
+            raw = raw[rows]
+        
+        if field.field_type in ('N', 'F'):
+            return self._decode_numbers(raw, field.decimal > 0)
+        if field.field_type == 'D':
+            return [self._decode_date(value) for value in raw.tolist()]
+        if field.field_type == 'L':
+            return [self._decode_logical(value) for value in raw.tolist()]
+        return self._decode_text(raw)
+    
+    def columns(
+        self,
+        names: Optional[Sequence[str]] = None,
+        rows: Optional[np.ndarray] = None
+    ) -> Dict[str, Any]:
+        return {name: self.column(name, rows) for name in (self.field_names if names is None else names)}
+    
+    def _decode_text(self, raw: np.ndarray) -> List[str]:
+        encoding = self.encoding
+        errors = self.encoding_errors
+        return [value.rstrip(b' \x00').decode(encoding, errors) for value in raw.tolist()]
+    
+    def _decode_numbers(self, raw: np.ndarray, decimal: bool) -> Any:
+        if len(raw) == 0:
+            return []
+        
+        values = np.char.strip(raw, b' *')
+        try:
+            if (values == b'').any():
+                raise ValueError('存在空值')
+            return values.astype(np.float64 if decimal else np.int64)
+        except (ValueError, OverflowError):
+            return [self._parse_number(value, decimal) for value in raw.tolist()]
+    
+    def _parse_number(self, value: bytes, decimal: bool) -> Optional[Any]:
+        value = value.partition(b'\x00')[0].strip(b'*')
+        if value == b'':
+            return None
+        if decimal:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return int(float(value))
+            except ValueError:
+                return None
+    
+    def _decode_date(self, value: bytes) -> Any:
+        if not value.replace(b'\x00', b'').replace(b' ', b'').replace(b'0', b''):
+            return None
+        date_str = value.decode('ascii')
+        try:
+            return datetime.strptime(date_str, '%Y%m%d').date()
+        except (TypeError, ValueError):
+            return date_str
+    
+    def _decode_logical(self, value: bytes) -> Optional[bool]:
+        if value in (b'', b' '):
+            return None
+        if value in b'YyTt1':
+            return True
+        if value in b'NnFf0':
+            return False
+        return None
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from src.dao.columnar_layer import ColumnarLayer
+from src.utils.logger_util import LoggerUtil
+
+
+class FeatureManifest:
+    VERSION = 1
+    
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self.logger = LoggerUtil.get_logger(self.__class__.__name__)
+    
+    @staticmethod
+    def hash_layer(layer: ColumnarLayer, key: str) -> List[List[Any]]:
+        entries = []
+        for i, key_val in enumerate(layer.column(key)):
+            hasher = hashlib.sha1(str(layer.shape_type).encode('utf-8'))
+            hasher.update(layer.points(i).tobytes())
+            hasher.update(layer.parts(i).tobytes())
+            bbox = None if layer.is_empty(i) else layer.bboxes[i].tolist()
+            entries.append([key_val, hasher.hexdigest(), bbox])
+        return entries
+    
+    @staticmethod
+    def diff(
+        old_entries: Sequence[Sequence[Any]],
+        new_entries: Sequence[Sequence[Any]]
+    ) -> Tuple[List[int], List[int], bool]:
+        remaining = Counter((entry[0], entry[1]) for entry in old_entries)
+        added = []
+        for i, entry in enumerate(new_entries):
+            signature = (entry[0], entry[1])
+            if remaining[signature] > 0:
+                remaining[signature] -= 1
+            else:
+                added.append(i)
+        
+        removed = []
+        for i, entry in enumerate(old_entries):
+            signature = (entry[0], entry[1])
+            if remaining[signature] > 0:
+                remaining[signature] -= 1
+                removed.append(i)
+        
+        added_set = set(added)
+        removed_set = set(removed)
+        kept_old = [(e[0], e[1]) for i, e in enumerate(old_entries) if i not in removed_set]
+        kept_new = [(e[0], e[1]) for i, e in enumerate(new_entries) if i not in added_set]
+        return added, removed, kept_old != kept_new
+    
+    @staticmethod
+    def mapping_key(value: Any) -> str:
+        return value if isinstance(value, str) else json.dumps(value)
+    
+    @staticmethod
+    def file_hash(path: str) -> Optional[str]:
+        if not os.path.exists(path):
+            return None
+        hasher = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(block)
+        return hasher.hexdigest()
+    
+    def load(self) -> Dict[str, Any]:
+        try:
+            if not os.path.exists(self.manifest_path):
+                return {}
+            
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') != self.VERSION:
+                self.logger.warning(f"清单版本不匹配, 忽略: {self.manifest_path}")
+                return {}
+            return manifest
+            
+        except Exception as e:
+            self.logger.warning(f"读取要素清单失败, 将全量分析: {self.manifest_path}", exc_info=True)
+            return {}
+    
+    def save(
+        self,
+        layers: Dict[str, Dict[str, Any]],
+        mappings: Dict[str, Optional[str]],
+        options: Optional[Dict[str, Any]] = None
+    ):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+            tmp_path = self.manifest_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': self.VERSION,
+                    'layers': layers,
+                    'mappings': mappings,
+                    'options': options or {}
+                }, f, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+            self.logger.info(f"保存要素清单: {self.manifest_path}")
+            
+        except Exception as e:
+            self.logger.error(f"保存要素清单失败: {self.manifest_path}", exc_info=True)
+            raise
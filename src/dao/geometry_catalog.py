@@ -0,0 +1,70 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from src.utils.logger_util import LoggerUtil
+
+
+class GeometryCatalog:
+    MAX_LAYERS = 8
+    _layers: 'OrderedDict[Tuple[str, str], Tuple[Tuple, Any]]' = OrderedDict()
+    _key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def _base_path(shapefile_path: str) -> str:
+        base, ext = os.path.splitext(os.path.abspath(shapefile_path))
+        return base if ext.lower() == '.shp' else os.path.abspath(shapefile_path)
+    
+    @staticmethod
+    def fingerprint(shapefile_path: str) -> Tuple:
+        base = GeometryCatalog._base_path(shapefile_path)
+        stamps = []
+        for ext in ('.shp', '.shx', '.dbf'):
+            path = base + ext
+            if os.path.exists(path):
+                stat = os.stat(path)
+                stamps.append((ext, stat.st_mtime_ns, stat.st_size))
+        return tuple(stamps)
+    
+    @staticmethod
+    def get_layer(shapefile_path: str, kind: str, loader: Callable[[], Any]) -> Any:
+        logger = LoggerUtil.get_logger('GeometryCatalog')
+        key = (GeometryCatalog._base_path(shapefile_path), kind)
+        stamp = GeometryCatalog.fingerprint(shapefile_path)
+        
+        with GeometryCatalog._lock:
+            key_lock = GeometryCatalog._key_locks.setdefault(key, threading.Lock())
+        
+        with key_lock:
+            with GeometryCatalog._lock:
+                cached = GeometryCatalog._layers.get(key)
+                if cached is not None and cached[0] == stamp:
+                    GeometryCatalog._layers.move_to_end(key)
+            if cached is not None and cached[0] == stamp:
+                logger.info(f"复用已加载图层: {shapefile_path} ({kind})")
+                return cached[1]
+            
+            layer = loader()
+            with GeometryCatalog._lock:
+                GeometryCatalog._layers[key] = (stamp, layer)
+                GeometryCatalog._layers.move_to_end(key)
+                while len(GeometryCatalog._layers) > max(1, GeometryCatalog.MAX_LAYERS):
+                    evicted, _ = GeometryCatalog._layers.popitem(last=False)
+                    logger.info(f"淘汰已加载图层: {evicted[0]} ({evicted[1]})")
+            return layer
+    
+    @staticmethod
+    def invalidate(shapefile_path: Optional[str] = None):
+        with GeometryCatalog._lock:
+            if shapefile_path is None:
+                GeometryCatalog._layers.clear()
+                return
+            
+            base = GeometryCatalog._base_path(shapefile_path)
+            for key in [key for key in GeometryCatalog._layers if key[0] == base]:
+                del GeometryCatalog._layers[key]
+    
+    @staticmethod
+    def clear():
+        GeometryCatalog.invalidate()
@@ -0,0 +1,56 @@
+import numpy as np
+from typing import Sequence
+
+
+class GeometryKernel:
+    @staticmethod
+    def as_coords(points: Sequence[Sequence[float]]) -> np.ndarray:
+        coords = np.asarray(points, dtype=np.float64)
+        if coords.ndim != 2 or len(coords) == 0:
+            return np.empty((0, 2), dtype=np.float64)
+        return coords[:, :2]
+    
+    @staticmethod
+    def _ccw(ax, ay, bx, by, cx, cy) -> np.ndarray:
+        return (cy - ay) * (bx - ax) > (by - ay) * (cx - ax)
+    
+    @staticmethod
+    def _intersect_block(p1: np.ndarray, p2: np.ndarray, p3: np.ndarray, p4: np.ndarray) -> bool:
+        ccw = GeometryKernel._ccw
+        x1, y1 = p1[:, 0:1], p1[:, 1:2]
+        x2, y2 = p2[:, 0:1], p2[:, 1:2]
+        x3, y3 = p3[:, 0], p3[:, 1]
+        x4, y4 = p4[:, 0], p4[:, 1]
+        
+        hits = ccw(x1, y1, x3, y3, x4, y4) != ccw(x2, y2, x3, y3, x4, y4)
+        if not hits.any():
+            return False
+        hits &= ccw(x1, y1, x2, y2, x3, y3) != ccw(x1, y1, x2, y2, x4, y4)
+        return bool(hits.any())
+    
+    @staticmethod
+    def segments_intersect_any(
+        coords1: np.ndarray,
+        coords2: np.ndarray,
+        block_size: int = 65536
+    ) -> bool:
+        n1 = len(coords1) - 1
+        n2 = len(coords2) - 1
+        if n1 < 1 or n2 < 1:
+            return False
+        
+        cols = min(n2, block_size)
+        rows = max(1, block_size // cols)
+        
+        for col in range(0, n2, cols):
+            col_end = min(col + cols, n2)
+            p3 = coords2[col:col_end]
+            p4 = coords2[col + 1:col_end + 1]
+            for row in range(0, n1, rows):
+                row_end = min(row + rows, n1)
+                p1 = coords1[row:row_end]
+                p2 = coords1[row + 1:row_end + 1]
+                if GeometryKernel._intersect_block(p1, p2, p3, p4):
+                    return True
+        
+        return False
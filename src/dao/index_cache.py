@@ -0,0 +1,229 @@
+import json
+import os
+import uuid
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from src.dao.prepared_polygon import PreparedPolygon
+from src.dao.spatial_index import STRTree
+from src.utils.cache_util import CacheUtil
+from src.utils.logger_util import LoggerUtil
+
+
+class SpatialIndexCache:
+    VERSION = 'spatial-index-v2'
+    
+    def __init__(self, cache_dir: str, max_size_mb: float = 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.logger = LoggerUtil.get_logger(self.__class__.__name__)
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('logger', None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.logger = LoggerUtil.get_logger(self.__class__.__name__)
+    
+    def _entry_prefix(self, source: str, key: str) -> str:
+        return CacheUtil.source_id(source, 'polygon', key)
+    
+    def _entry_dir(self, source: str, key: str) -> str:
+        fingerprint = CacheUtil.fingerprint(source, self.VERSION)
+        return os.path.join(self.cache_dir, f"{self._entry_prefix(source, key)}_{fingerprint}")
+    
+    def load_polygon_index(
+        self,
+        source: str,
+        key: str,
+        geometries: Sequence[Any]
+    ) -> Optional[Tuple[STRTree, List[Optional[PreparedPolygon]]]]:
+        try:
+            entry_dir = self._entry_dir(source, key)
+            meta_path = os.path.join(entry_dir, 'meta.json')
+            if not os.path.exists(meta_path):
+                return None
+            
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('feature_count') != len(geometries):
+                return None
+            
+            arrays = {
+                name: np.load(os.path.join(entry_dir, f"{name}.npy"), mmap_mode='r')
+                for name in meta['arrays']
+            }
+            
+            tree = STRTree.from_arrays({
+                name[len('tree_'):]: value
+                for name, value in arrays.items() if name.startswith('tree_')
+            })
+            prepared = self._unpack_polygons(arrays, geometries)
+            
+            CacheUtil.touch(entry_dir)
+            self.logger.info(f"从缓存加载空间索引: {entry_dir}")
+            return tree, prepared
+            
+        except Exception as e:
+            self.logger.warning(f"读取空间索引缓存失败, 将重新构建: {source}", exc_info=True)
+            return None
+    
+    def save_polygon_index(
+        self,
+        source: str,
+        key: str,
+        tree: STRTree,
+        prepared: Sequence[Optional[PreparedPolygon]]
+    ) -> bool:
+        tmp_dir = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entry_dir = self._entry_dir(source, key)
+            tmp_dir = os.path.join(self.cache_dir, f".tmp_{uuid.uuid4().hex}")
+            os.makedirs(tmp_dir)
+            
+            arrays = {f"tree_{name}": value for name, value in tree.to_arrays().items()}
+            arrays.update(self._pack_polygons(prepared))
+            
+            for name, value in arrays.items():
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), value)
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': self.VERSION,
+                    'source': os.path.abspath(source),
+                    'key': key,
+                    'feature_count': len(prepared),
+                    'arrays': sorted(arrays)
+                }, f, ensure_ascii=False, indent=2)
+            
+            self.invalidate(source, key)
+            os.replace(tmp_dir, entry_dir)
+            self.logger.info(f"保存空间索引缓存: {entry_dir}")
+            
+            for path in CacheUtil.evict_lru(self.cache_dir, self.max_bytes, keep=entry_dir):
+                self.logger.info(f"淘汰空间索引缓存: {path}")
+            return True
+            
+        except Exception as e:
+            self.logger.warning(f"保存空间索引缓存失败: {source}", exc_info=True)
+            if tmp_dir is not None:
+                CacheUtil.remove(tmp_dir)
+            return False
+    
+    def invalidate(self, source: str, key: Optional[str] = None):
+        if not os.path.isdir(self.cache_dir):
+            return
+        
+        if key is not None:
+            prefixes = (self._entry_prefix(source, key) + '_',)
+        else:
+            prefixes = tuple(
+                name.split('_')[0] + '_'
+                for name in os.listdir(self.cache_dir)
+                if self._read_source(os.path.join(self.cache_dir, name)) == os.path.abspath(source)
+            )
+        
+        for name in os.listdir(self.cache_dir):
+            if prefixes and name.startswith(prefixes):
+                CacheUtil.remove(os.path.join(self.cache_dir, name))
+    
+    def _read_source(self, entry_dir: str) -> Optional[str]:
+        try:
+            with open(os.path.join(entry_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+                return json.load(f).get('source')
+        except Exception:
+            return None
+    
+    def _pack_polygons(self, prepared: Sequence[Optional[PreparedPolygon]]) -> Dict[str, np.ndarray]:
+        count = len(prepared)
+        mask = np.zeros(count, dtype=bool)
+        y0 = np.zeros(count, dtype=np.float64)
+        band_height = np.ones(count, dtype=np.float64)
+        edge_offsets = np.zeros(count + 1, dtype=np.int64)
+        band_offset_offsets = np.zeros(count + 1, dtype=np.int64)
+        band_edge_offsets = np.zeros(count + 1, dtype=np.int64)
+        raster_offsets = np.zeros(count + 1, dtype=np.int64)
+        raster_sizes = np.zeros((count, 2), dtype=np.int64)
+        raster_frames = np.zeros((count, 4), dtype=np.float64)
+        edges, band_offsets, band_edges, rasters = [], [], [], []
+        
+        for i, polygon in enumerate(prepared):
+            edge_offsets[i + 1] = edge_offsets[i]
+            band_offset_offsets[i + 1] = band_offset_offsets[i]
+            band_edge_offsets[i + 1] = band_edge_offsets[i]
+            raster_offsets[i + 1] = raster_offsets[i]
+            if polygon is None:
+                continue
+            
+            arrays = polygon.to_arrays()
+            mask[i] = True
+            y0[i] = arrays['y0']
+            band_height[i] = arrays['band_height']
+            edges.append(arrays['edges'])
+            band_offsets.append(arrays['band_offsets'])
+            band_edges.append(arrays['band_edges'])
+            edge_offsets[i + 1] += len(arrays['edges'])
+            band_offset_offsets[i + 1] += len(arrays['band_offsets'])
+            band_edge_offsets[i + 1] += len(arrays['band_edges'])
+            if arrays['raster_cells'] is not None:
+                rasters.append(arrays['raster_cells'].ravel())
+                raster_sizes[i] = arrays['raster_cells'].shape
+                raster_frames[i] = arrays['raster_frame']
+                raster_offsets[i + 1] += arrays['raster_cells'].size
+        
+        return {
+            'poly_mask': mask,
+            'poly_y0': y0,
+            'poly_band_height': band_height,
+            'poly_edge_offsets': edge_offsets,
+            'poly_band_offset_offsets': band_offset_offsets,
+            'poly_band_edge_offsets': band_edge_offsets,
+            'poly_edges': np.vstack(edges) if edges else np.empty((0, 4), dtype=np.float64),
+            'poly_band_offsets': np.concatenate(band_offsets) if band_offsets else np.empty(0, dtype=np.int64),
+            'poly_band_edges': np.concatenate(band_edges) if band_edges else np.empty(0, dtype=np.int64),
+            'poly_raster_offsets': raster_offsets,
+            'poly_raster_sizes': raster_sizes,
+            'poly_raster_frames': raster_frames,
+            'poly_rasters': np.concatenate(rasters) if rasters else np.empty(0, dtype=np.int8)
+        }
+    
+    def _unpack_polygons(
+        self,
+        arrays: Dict[str, np.ndarray],
+        geometries: Sequence[Any]
+    ) -> List[Optional[PreparedPolygon]]:
+        mask = np.asarray(arrays['poly_mask'])
+        y0 = np.asarray(arrays['poly_y0']).tolist()
+        band_height = np.asarray(arrays['poly_band_height']).tolist()
+        edge_offsets = np.asarray(arrays['poly_edge_offsets']).tolist()
+        band_offset_offsets = np.asarray(arrays['poly_band_offset_offsets']).tolist()
+        band_edge_offsets = np.asarray(arrays['poly_band_edge_offsets']).tolist()
+        raster_offsets = np.asarray(arrays['poly_raster_offsets']).tolist()
+        raster_sizes = np.asarray(arrays['poly_raster_sizes']).tolist()
+        raster_frames = np.asarray(arrays['poly_raster_frames']).tolist()
+        
+        prepared = []
+        for i, geometry in enumerate(geometries):
+            if not mask[i]:
+                prepared.append(None)
+                continue
+            
+            raster_cells = None
+            raster_frame = None
+            if raster_offsets[i + 1] > raster_offsets[i]:
+                raster_cells = arrays['poly_rasters'][raster_offsets[i]:raster_offsets[i + 1]].reshape(raster_sizes[i])
+                raster_frame = raster_frames[i]
+            
+            prepared.append(PreparedPolygon.from_arrays(
+                geometry.points,
+                getattr(geometry, 'parts', None),
+                arrays['poly_edges'][edge_offsets[i]:edge_offsets[i + 1]],
+                arrays['poly_band_offsets'][band_offset_offsets[i]:band_offset_offsets[i + 1]],
+                arrays['poly_band_edges'][band_edge_offsets[i]:band_edge_offsets[i + 1]],
+                y0[i],
+                band_height[i],
+                raster_cells,
+                raster_frame
+            ))
+        return prepared
@@ -0,0 +1,42 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+from src.utils.logger_util import LoggerUtil
+
+
+class LayerLoader:
+    def __init__(self, workers: int = 5):
+        self.workers = workers
+        self.timings: Dict[str, float] = {}
+        self.logger = LoggerUtil.get_logger(self.__class__.__name__)
+    
+    def load(self, readers: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+        self.timings = {}
+        if not readers:
+            return {}
+        
+        workers = max(1, min(self.workers, len(readers)))
+        start = time.perf_counter()
+        self.logger.info(f"并发读取 {len(readers)} 个图层 (线程数: {workers})")
+        
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {name: executor.submit(self._timed, name, reader) for name, reader in readers.items()}
+                layers = {name: future.result() for name, future in futures.items()}
+            
+            elapsed = time.perf_counter() - start
+            self.logger.info(
+                f"图层读取完成, 总耗时 {elapsed:.2f} 秒 (各图层累计 {sum(self.timings.values()):.2f} 秒)"
+            )
+            return layers
+            
+        except Exception as e:
+            self.logger.error("并发读取图层失败", exc_info=True)
+            raise
+    
+    def _timed(self, name: str, reader: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        layer = reader()
+        self.timings[name] = time.perf_counter() - start
+        self.logger.info(f"图层 {name} 读取完成, 耗时 {self.timings[name]:.2f} 秒")
+        return layer
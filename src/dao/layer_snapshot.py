@@ -0,0 +1,130 @@
+import json
+import os
+import uuid
+from datetime import date
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from src.dao.columnar_layer import ColumnarLayer
+from src.utils.cache_util import CacheUtil
+from src.utils.logger_util import LoggerUtil
+
+
+class LayerSnapshotCache:
+    VERSION = 'layer-snapshot-v1'
+    GEOMETRY_ARRAYS = ('coords', 'part_offsets', 'feature_offsets', 'bboxes')
+    COLUMN_KINDS = {
+        'str': (str, str, ''),
+        'int': (int, np.int64, 0),
+        'float': (float, np.float64, 0.0),
+        'bool': (bool, np.bool_, False),
+        'date': (date, 'datetime64[D]', date(1970, 1, 1))
+    }
+    
+    def __init__(self, cache_dir: str, max_size_mb: float = 2048):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.logger = LoggerUtil.get_logger(self.__class__.__name__)
+    
+    def _entry_prefix(self, source: str, fields: Optional[Sequence[str]]) -> str:
+        return CacheUtil.source_id(source, 'layer', '*' if fields is None else ','.join(fields))
+    
+    def _entry_path(self, source: str, fields: Optional[Sequence[str]]) -> str:
+        fingerprint = CacheUtil.fingerprint(source, self.VERSION)
+        return os.path.join(self.cache_dir, f"{self._entry_prefix(source, fields)}_{fingerprint}.npz")
+    
+    def load(self, source: str, fields: Optional[Sequence[str]] = None) -> Optional[ColumnarLayer]:
+        try:
+            path = self._entry_path(source, fields)
+            if not os.path.exists(path):
+                return None
+            
+            with np.load(path, allow_pickle=False) as snapshot:
+                meta = json.loads(str(snapshot['meta']))
+                columns = {
+                    name: self._unpack_column(snapshot, f"column_{i}", kind)
+                    for i, (name, kind) in enumerate(meta['columns'])
+                }
+                layer = ColumnarLayer(
+                    meta['shape_type'],
+                    *(snapshot[name] for name in self.GEOMETRY_ARRAYS),
+                    columns
+                )
+            
+            CacheUtil.touch(path)
+            self.logger.info(f"从快照加载图层: {path}")
+            return layer
+            
+        except Exception as e:
+            self.logger.warning(f"读取图层快照失败, 将重新解析: {source}", exc_info=True)
+            return None
+    
+    def save(self, source: str, fields: Optional[Sequence[str]], layer: ColumnarLayer) -> bool:
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._entry_path(source, fields)
+            tmp_path = os.path.join(self.cache_dir, f".tmp_{uuid.uuid4().hex}.npz")
+            
+            arrays = {name: getattr(layer, name) for name in self.GEOMETRY_ARRAYS}
+            kinds = []
+            for i, name in enumerate(layer.fields):
+                kind, packed = self._pack_column(layer.column(name))
+                kinds.append([name, kind])
+                arrays.update({f"column_{i}_{part}": value for part, value in packed.items()})
+            arrays['meta'] = np.array(json.dumps({
+                'version': self.VERSION,
+                'source': os.path.abspath(source),
+                'shape_type': layer.shape_type,
+                'columns': kinds
+            }, ensure_ascii=False))
+            
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            
+            self.invalidate(source, fields)
+            os.replace(tmp_path, path)
+            self.logger.info(f"保存图层快照: {path} ({os.path.getsize(path) / 1024 / 1024:.2f} MB)")
+            
+            for evicted in CacheUtil.evict_lru(self.cache_dir, self.max_bytes, keep=path):
+                self.logger.info(f"淘汰图层快照: {evicted}")
+            return True
+            
+        except Exception as e:
+            self.logger.warning(f"保存图层快照失败: {source}", exc_info=True)
+            if tmp_path is not None:
+                CacheUtil.remove(tmp_path)
+            return False
+    
+    def invalidate(self, source: str, fields: Optional[Sequence[str]] = None):
+        if not os.path.isdir(self.cache_dir):
+            return
+        
+        prefix = self._entry_prefix(source, fields) + '_'
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix):
+                CacheUtil.remove(os.path.join(self.cache_dir, name))
+    
+    @staticmethod
+    def _pack_column(values: Any) -> Tuple[str, Dict[str, np.ndarray]]:
+        if isinstance(values, np.ndarray):
+            return 'array', {'values': values}
+        
+        mask = np.array([value is None for value in values], dtype=bool)
+        present = [value for value in values if value is not None]
+        for kind, (value_type, dtype, fill) in LayerSnapshotCache.COLUMN_KINDS.items():
+            if all(type(value) is value_type for value in present):
+                filled = [fill if value is None else value for value in values]
+                return kind, {'values': np.array(filled, dtype=dtype), 'mask': mask}
+        
+        raise ValueError(f"无法写入快照的混合类型列: {sorted({type(value).__name__ for value in present})}")
+    
+    @staticmethod
+    def _unpack_column(snapshot: Any, prefix: str, kind: str) -> Any:
+        values = snapshot[f"{prefix}_values"]
+        if kind == 'array':
+            return values
+        
+        items: List[Any] = values.astype(object).tolist() if kind == 'date' else values.tolist()
+        for i in np.nonzero(snapshot[f"{prefix}_mask"])[0].tolist():
+            items[i] = None
+        return items
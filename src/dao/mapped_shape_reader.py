@@ -0,0 +1,201 @@
+import mmap
+import os
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from src.utils.logger_util import LoggerUtil
+
+
+class MappedShapeReader:
+    NULL = 0
+    POINT_TYPES = (1, 11, 21)
+    MULTI_TYPES = (3, 5, 13, 15, 23, 25)
+    HEADER_SIZE = 100
+    
+    def __init__(self, shapefile_path: str):
+        ext = os.path.splitext(shapefile_path)[1]
+        self.shp_path = shapefile_path if ext.lower() == '.shp' else shapefile_path + '.shp'
+        self.shx_path = os.path.splitext(self.shp_path)[0] + '.shx'
+        self.logger = LoggerUtil.get_logger(self.__class__.__name__)
+        
+        self._files = []
+        self._maps = []
+        self.buffer = self._map(self.shp_path)
+        
+        if int(self.buffer[:4].view('>i4')[0]) != 9994:
+            self.close()
+            raise ValueError(f"不是有效的Shapefile文件: {self.shp_path}")
+        
+        self.shape_type = int(self.buffer[32:36].view('<i4')[0])
+        self.bbox = tuple(self.buffer[36:68].view('<f8').tolist())
+        if not self.supports(self.shape_type):
+            self.close()
+            raise ValueError(f"不支持的几何类型: {self.shape_type}")
+        
+        self.offsets = self._record_offsets()
+        self.record_types = self._gather('<i4', self.offsets)
+        self._part_counts: Optional[np.ndarray] = None
+        self._point_counts: Optional[np.ndarray] = None
+    
+    @staticmethod
+    def supports(shape_type: int) -> bool:
+        return shape_type in (MappedShapeReader.NULL,) + MappedShapeReader.POINT_TYPES + MappedShapeReader.MULTI_TYPES
+    
+    @staticmethod
+    def read_shape_type(shapefile_path: str) -> int:
+        ext = os.path.splitext(shapefile_path)[1]
+        shp_path = shapefile_path if ext.lower() == '.shp' else shapefile_path + '.shp'
+        with open(shp_path, 'rb') as f:
+            header = f.read(MappedShapeReader.HEADER_SIZE)
+        return int(np.frombuffer(header[32:36], dtype='<i4')[0])
+    
+    def __enter__(self) -> 'MappedShapeReader':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def __len__(self) -> int:
+        return len(self.offsets)
+    
+    def _map(self, path: str) -> np.ndarray:
+        f = open(path, 'rb')
+        self._files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return np.empty(0, dtype=np.uint8)
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return np.frombuffer(mapped, dtype=np.uint8)
+    
+    def close(self):
+        self.buffer = None
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                pass
+        for f in self._files:
+            f.close()
+        self._maps = []
+        self._files = []
+    
+    def _record_offsets(self) -> np.ndarray:
+        if os.path.exists(self.shx_path):
+            index = self._map(self.shx_path)
+            entries = index[self.HEADER_SIZE:].view('>i4').reshape(-1, 2)
+            return entries[:, 0].astype(np.int64) * 2 + 8
+        
+        self.logger.warning(f"缺少索引文件, 顺序扫描记录: {self.shx_path}")
+        offsets = []
+        position = self.HEADER_SIZE
+        end = len(self.buffer)
+        while position + 8 <= end:
+            length = int(self.buffer[position + 4:position + 8].view('>i4')[0]) * 2
+            offsets.append(position + 8)
+            position += 8 + length
+        return np.array(offsets, dtype=np.int64)
+    
+    def _gather(self, dtype: str, offsets: np.ndarray) -> np.ndarray:
+        width = np.dtype(dtype).itemsize
+        if len(offsets) == 0:
+            return np.empty(0, dtype=dtype)
+        raw = self.buffer[offsets[:, None] + np.arange(width)]
+        return raw.view(dtype).ravel()
+    
+    def _counts(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._part_counts is None:
+            if self.shape_type in self.POINT_TYPES:
+                present = (self.record_types != self.NULL).astype(np.int64)
+                self._part_counts = present
+                self._point_counts = present
+            else:
+                multi = self.record_types != self.NULL
+                self._part_counts = np.where(multi, self._gather('<i4', self.offsets + 36), 0).astype(np.int64)
+                self._point_counts = np.where(multi, self._gather('<i4', self.offsets + 40), 0).astype(np.int64)
+        return self._part_counts, self._point_counts
+    
+    def points(self, index: int) -> np.ndarray:
+        offset = int(self.offsets[index])
+        if self.record_types[index] == self.NULL:
+            return np.empty((0, 2), dtype=np.float64)
+        if self.shape_type in self.POINT_TYPES:
+            return self.buffer[offset + 4:offset + 20].view('<f8').reshape(1, 2)
+        
+        part_counts, point_counts = self._counts()
+        start = offset + 44 + 4 * int(part_counts[index])
+        return self.buffer[start:start + 16 * int(point_counts[index])].view('<f8').reshape(-1, 2)
+    
+    def parts(self, index: int) -> np.ndarray:
+        offset = int(self.offsets[index])
+        if self.record_types[index] == self.NULL:
+            return np.empty(0, dtype=np.int32)
+        if self.shape_type in self.POINT_TYPES:
+            return np.zeros(1, dtype=np.int32)
+        
+        part_counts, _ = self._counts()
+        return self.buffer[offset + 44:offset + 44 + 4 * int(part_counts[index])].view('<i4')
+    
+    def geometry_arrays(self, start: int = 0, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        end = len(self) if end is None else min(end, len(self))
+        start = min(max(0, start), end)
+        _, point_counts = self._counts()
+        point_counts = point_counts[start:end]
+        present = np.nonzero(point_counts)[0]
+        feature_parts = np.zeros(end - start, dtype=np.int64)
+        
+        if self.shape_type in self.POINT_TYPES:
+            raw = self.buffer[self.offsets[start + present][:, None] + 4 + np.arange(16)]
+            coords = raw.view('<f8').reshape(-1, 2).astype(np.float64)
+            part_sizes = np.ones(len(present), dtype=np.int64)
+            feature_parts[present] = 1
+        else:
+            point_chunks: List[np.ndarray] = []
+            part_chunks: List[np.ndarray] = []
+            for i in (start + present).tolist():
+                parts = self.parts(i)
+                point_chunks.append(self.points(i))
+                part_chunks.append(parts if len(parts) else np.zeros(1, dtype=np.int32))
+            coords = (
+                np.concatenate(point_chunks).astype(np.float64)
+                if point_chunks else np.empty((0, 2), dtype=np.float64)
+            )
+            part_sizes = self._part_sizes(part_chunks, point_counts[present])
+            feature_parts[present] = [len(chunk) for chunk in part_chunks]
+        
+        part_offsets = np.zeros(len(part_sizes) + 1, dtype=np.int64)
+        np.cumsum(part_sizes, out=part_offsets[1:])
+        feature_offsets = np.zeros(end - start + 1, dtype=np.int64)
+        np.cumsum(feature_parts, out=feature_offsets[1:])
+        
+        return {
+            'coords': coords,
+            'part_offsets': part_offsets,
+            'feature_offsets': feature_offsets,
+            'bboxes': self._feature_bboxes(coords, point_counts)
+        }
+    
+    def _part_sizes(self, part_chunks: List[np.ndarray], point_counts: np.ndarray) -> np.ndarray:
+        if not part_chunks:
+            return np.empty(0, dtype=np.int64)
+        
+        starts = np.concatenate(part_chunks).astype(np.int64)
+        lengths = np.array([len(chunk) for chunk in part_chunks], dtype=np.int64)
+        last = np.cumsum(lengths) - 1
+        starts[last - lengths + 1] = 0
+        ends = np.empty_like(starts)
+        ends[:-1] = starts[1:]
+        ends[last] = point_counts
+        return ends - starts
+    
+    def _feature_bboxes(self, coords: np.ndarray, point_counts: np.ndarray) -> np.ndarray:
+        bboxes = np.full((len(point_counts), 4), np.nan, dtype=np.float64)
+        present = np.nonzero(point_counts)[0]
+        if len(present) == 0:
+            return bboxes
+        
+        starts = np.zeros(len(present), dtype=np.int64)
+        np.cumsum(point_counts[present][:-1], out=starts[1:])
+        bboxes[present, 0] = np.minimum.reduceat(coords[:, 0], starts)
+        bboxes[present, 1] = np.minimum.reduceat(coords[:, 1], starts)
+        bboxes[present, 2] = np.maximum.reduceat(coords[:, 0], starts)
+        bboxes[present, 3] = np.maximum.reduceat(coords[:, 1], starts)
+        return bboxes
@@ -0,0 +1,255 @@
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from src.dao.geometry_kernel import GeometryKernel
+from src.dao.segment_index import MonotoneChainIndex
+
+
+class PreparedPolygon:
+    OUTSIDE = 0
+    INSIDE = 1
+    BOUNDARY = 2
+    
+    def __init__(
+        self,
+        points: Sequence[Sequence[float]],
+        parts: Optional[Sequence[int]] = None,
+        band_count: Optional[int] = None,
+        raster_size: Optional[int] = None
+    ):
+        self._ring_source = (points, parts)
+        self._rings: Optional[List[MonotoneChainIndex]] = None
+        
+        edges = [np.hstack([ring, np.roll(ring, -1, axis=0)]) for ring in self._ring_coords()]
+        self.edges = np.vstack(edges) if edges else np.empty((0, 4), dtype=np.float64)
+        self._build_bands(band_count)
+        self._build_raster(raster_size)
+    
+    @staticmethod
+    def from_arrays(
+        points: Sequence[Sequence[float]],
+        parts: Optional[Sequence[int]],
+        edges: np.ndarray,
+        band_offsets: np.ndarray,
+        band_edges: np.ndarray,
+        y0: float,
+        band_height: float,
+        raster_cells: Optional[np.ndarray] = None,
+        raster_frame: Optional[Sequence[float]] = None
+    ) -> 'PreparedPolygon':
+        prepared = PreparedPolygon.__new__(PreparedPolygon)
+        prepared._ring_source = (points, parts)
+        prepared._rings = None
+        prepared.edges = edges
+        prepared.band_offsets = band_offsets
+        prepared.band_edges = band_edges
+        prepared.y0 = y0
+        prepared.band_height = band_height
+        prepared.raster_cells = raster_cells
+        prepared.raster_frame = tuple(raster_frame) if raster_frame is not None else None
+        return prepared
+    
+    def to_arrays(self) -> Dict[str, Any]:
+        return {
+            'edges': self.edges,
+            'band_offsets': self.band_offsets,
+            'band_edges': self.band_edges,
+            'y0': self.y0,
+            'band_height': self.band_height,
+            'raster_cells': self.raster_cells,
+            'raster_frame': self.raster_frame
+        }
+    
+    def _ring_coords(self) -> List[np.ndarray]:
+        points, parts = self._ring_source
+        coords = GeometryKernel.as_coords(points)
+        starts = [int(start) for start in parts] if parts is not None and len(parts) else [0]
+        ends = starts[1:] + [len(coords)]
+        
+        rings = []
+        for start, end in zip(starts, ends):
+            ring = coords[start:end]
+            if len(ring) == 0:
+                continue
+            if not np.array_equal(ring[0], ring[-1]):
+                ring = np.vstack([ring, ring[:1]])
+            rings.append(ring)
+        return rings
+    
+    @property
+    def rings(self) -> List[MonotoneChainIndex]:
+        if self._rings is None:
+            self._rings = [MonotoneChainIndex(ring) for ring in self._ring_coords()]
+        return self._rings
+    
+    def _build_bands(self, band_count: Optional[int]):
+        edges = self.edges
+        if len(edges) == 0:
+            self.y0 = 0.0
+            self.band_height = 1.0
+            self.band_offsets = np.zeros(1, dtype=np.int64)
+            self.band_edges = np.empty(0, dtype=np.int64)
+            return
+        
+        edge_miny = np.minimum(edges[:, 1], edges[:, 3])
+        edge_maxy = np.maximum(edges[:, 1], edges[:, 3])
+        self.y0 = float(edge_miny.min())
+        height = float(edge_maxy.max()) - self.y0
+        
+        if band_count is None:
+            band_count = min(4096, max(1, len(edges) // 8))
+        if height <= 0:
+            band_count = 1
+        self.band_height = height / band_count if height > 0 else 1.0
+        
+        first = self._band_of(edge_miny, band_count)
+        last = self._band_of(edge_maxy, band_count)
+        spans = last - first + 1
+        
+        edge_ids = np.repeat(np.arange(len(edges), dtype=np.int64), spans)
+        span_starts = np.repeat(np.cumsum(spans) - spans, spans)
+        bands = np.repeat(first, spans) + (np.arange(len(edge_ids)) - span_starts)
+        
+        order = np.argsort(bands, kind='stable')
+        self.band_edges = edge_ids[order]
+        self.band_offsets = np.zeros(band_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(bands, minlength=band_count), out=self.band_offsets[1:])
+    
+    def _band_of(self, y: np.ndarray, band_count: Optional[int] = None) -> np.ndarray:
+        if band_count is None:
+            band_count = len(self.band_offsets) - 1
+        bands = np.floor((y - self.y0) / self.band_height).astype(np.int64)
+        return np.clip(bands, 0, band_count - 1)
+    
+    def _build_raster(self, raster_size: Optional[int]):
+        self.raster_cells: Optional[np.ndarray] = None
+        self.raster_frame: Optional[Tuple[float, float, float, float]] = None
+        
+        edges = self.edges
+        if len(edges) < 8:
+            return
+        
+        x0 = float(min(edges[:, 0].min(), edges[:, 2].min()))
+        y0 = float(min(edges[:, 1].min(), edges[:, 3].min()))
+        x1 = float(max(edges[:, 0].max(), edges[:, 2].max()))
+        y1 = float(max(edges[:, 1].max(), edges[:, 3].max()))
+        if x1 <= x0 or y1 <= y0:
+            return
+        
+        if raster_size is None:
+            raster_size = min(256, max(4, int(np.sqrt(len(edges)) * 2)))
+        cell_w = (x1 - x0) / raster_size
+        cell_h = (y1 - y0) / raster_size
+        self.raster_frame = (x0, y0, cell_w, cell_h)
+        
+        dx = edges[:, 2] - edges[:, 0]
+        dy = edges[:, 3] - edges[:, 1]
+        pieces = np.maximum(np.ceil(np.maximum(np.abs(dx) / cell_w, np.abs(dy) / cell_h)), 1).astype(np.int64)
+        edge_ids = np.repeat(np.arange(len(edges)), pieces)
+        piece_starts = np.repeat(np.cumsum(pieces) - pieces, pieces)
+        t0 = (np.arange(len(edge_ids)) - piece_starts) / pieces[edge_ids]
+        t1 = t0 + 1.0 / pieces[edge_ids]
+        
+        ax = edges[edge_ids, 0] + dx[edge_ids] * t0
+        bx = edges[edge_ids, 0] + dx[edge_ids] * t1
+        ay = edges[edge_ids, 1] + dy[edge_ids] * t0
+        by = edges[edge_ids, 1] + dy[edge_ids] * t1
+        
+        pad_x = cell_w * 1e-6
+        pad_y = cell_h * 1e-6
+        ix0 = np.clip(np.floor((np.minimum(ax, bx) - pad_x - x0) / cell_w), 0, raster_size - 1).astype(np.int64)
+        ix1 = np.clip(np.floor((np.maximum(ax, bx) + pad_x - x0) / cell_w), 0, raster_size - 1).astype(np.int64)
+        iy0 = np.clip(np.floor((np.minimum(ay, by) - pad_y - y0) / cell_h), 0, raster_size - 1).astype(np.int64)
+        iy1 = np.clip(np.floor((np.maximum(ay, by) + pad_y - y0) / cell_h), 0, raster_size - 1).astype(np.int64)
+        
+        boundary = np.zeros((raster_size, raster_size), dtype=bool)
+        for ox in range(int((ix1 - ix0).max()) + 1):
+            for oy in range(int((iy1 - iy0).max()) + 1):
+                keep = (ix0 + ox <= ix1) & (iy0 + oy <= iy1)
+                boundary[iy0[keep] + oy, ix0[keep] + ox] = True
+        
+        cells = np.full((raster_size, raster_size), self.OUTSIDE, dtype=np.int8)
+        cells[boundary] = self.BOUNDARY
+        free_y, free_x = np.nonzero(~boundary)
+        if len(free_x):
+            centers = np.column_stack([x0 + (free_x + 0.5) * cell_w, y0 + (free_y + 0.5) * cell_h])
+            inside = self._contains_exact(centers)
+            cells[free_y[inside], free_x[inside]] = self.INSIDE
+        self.raster_cells = cells
+    
+    def _classify(self, coords: np.ndarray) -> np.ndarray:
+        x0, y0, cell_w, cell_h = self.raster_frame
+        size_y, size_x = self.raster_cells.shape
+        fx = (coords[:, 0] - x0) / cell_w
+        fy = (coords[:, 1] - y0) / cell_h
+        
+        classes = np.full(len(coords), self.OUTSIDE, dtype=np.int8)
+        slack = 1e-6
+        within = (fx >= -slack) & (fx <= size_x + slack) & (fy >= -slack) & (fy <= size_y + slack)
+        ix = np.clip(fx[within], 0, size_x - 1).astype(np.int64)
+        iy = np.clip(fy[within], 0, size_y - 1).astype(np.int64)
+        classes[within] = self.raster_cells[iy, ix]
+        return classes
+    
+    def _crossings(self, coords: np.ndarray, edge_ids: np.ndarray) -> np.ndarray:
+        edges = self.edges[edge_ids]
+        p1x, p1y = edges[:, 0], edges[:, 1]
+        p2x, p2y = edges[:, 2], edges[:, 3]
+        x = coords[:, 0:1]
+        y = coords[:, 1:2]
+        
+        spans = (y > np.minimum(p1y, p2y)) & (y <= np.maximum(p1y, p2y)) & (x <= np.maximum(p1x, p2x))
+        vertical = p1x == p2x
+        dy = np.where(p1y != p2y, p2y - p1y, 1.0)
+        with np.errstate(invalid='ignore', over='ignore'):
+            xinters = (y - p1y) * (p2x - p1x) / dy + p1x
+        hits = spans & (vertical | (x <= xinters))
+        return np.count_nonzero(hits, axis=1)
+    
+    def contains_points(self, points: Sequence[Sequence[float]], stop_on_first: bool = False) -> np.ndarray:
+        coords = GeometryKernel.as_coords(points)
+        if self.raster_cells is None or len(coords) == 0:
+            return self._contains_exact(coords, stop_on_first)
+        
+        classes = self._classify(coords)
+        inside = classes == self.INSIDE
+        if stop_on_first and inside.any():
+            return inside
+        
+        boundary = np.nonzero(classes == self.BOUNDARY)[0]
+        if len(boundary):
+            inside[boundary] = self._contains_exact(coords[boundary], stop_on_first)
+        return inside
+    
+    def _contains_exact(self, coords: np.ndarray, stop_on_first: bool = False) -> np.ndarray:
+        inside = np.zeros(len(coords), dtype=bool)
+        if len(coords) == 0 or len(self.band_edges) == 0:
+            return inside
+        
+        bands = self._band_of(coords[:, 1])
+        for band in np.unique(bands):
+            edge_ids = self.band_edges[self.band_offsets[band]:self.band_offsets[band + 1]]
+            if len(edge_ids) == 0:
+                continue
+            members = np.nonzero(bands == band)[0]
+            inside[members] = self._crossings(coords[members], edge_ids) % 2 == 1
+            if stop_on_first and inside[members].any():
+                break
+        
+        return inside
+    
+    def contains_any(self, points: Sequence[Sequence[float]]) -> bool:
+        return bool(self.contains_points(points, stop_on_first=True).any())
+    
+    def contains(self, point: Sequence[float]) -> bool:
+        return bool(self.contains_points([point])[0])
+    
+    def intersects_line(
+        self,
+        line_index: MonotoneChainIndex,
+        segment_test: Callable[[Sequence, Sequence, Sequence, Sequence], bool],
+        use_kernel: bool = True
+    ) -> bool:
+        for ring in self.rings:
+            if line_index.intersects(ring, segment_test, use_kernel):
+                return True
+        return False
@@ -0,0 +1,119 @@
+import numpy as np
+from typing import Callable, List, Sequence, Tuple
+from src.dao.geometry_kernel import GeometryKernel
+
+
+class MonotoneChainIndex:
+    def __init__(self, points: Sequence[Sequence[float]]):
+        self.coords = GeometryKernel.as_coords(points)
+        self.chains: List[Tuple[int, int]] = []
+        self.chain_envelopes: List[Tuple[float, float, float, float]] = []
+        self._build()
+    
+    def __len__(self) -> int:
+        return len(self.chains)
+    
+    def _build(self):
+        n = len(self.coords)
+        if n < 2:
+            return
+        
+        deltas = np.diff(self.coords, axis=0)
+        quadrants = (deltas[:, 0] >= 0).astype(np.int8) * 2 + (deltas[:, 1] >= 0)
+        breaks = np.nonzero(quadrants[1:] != quadrants[:-1])[0] + 1
+        
+        starts = np.concatenate([[0], breaks])
+        ends = np.concatenate([breaks, [n - 1]])
+        self.chains = list(zip(starts.tolist(), ends.tolist()))
+        
+        first = self.coords[starts]
+        last = self.coords[ends]
+        self.chain_envelopes = list(map(tuple, np.hstack([
+            np.minimum(first, last), np.maximum(first, last)
+        ]).tolist()))
+    
+    def point(self, index: int) -> Tuple[float, float]:
+        return (self.coords.item(index, 0), self.coords.item(index, 1))
+    
+    def envelope(self, start: int, end: int) -> Tuple[float, float, float, float]:
+        item = self.coords.item
+        x1, y1 = item(start, 0), item(start, 1)
+        x2, y2 = item(end, 0), item(end, 1)
+        return (
+            min(x1, x2),
+            min(y1, y2),
+            max(x1, x2),
+            max(y1, y2)
+        )
+    
+    def intersects(
+        self,
+        other: 'MonotoneChainIndex',
+        segment_test: Callable[[Sequence, Sequence, Sequence, Sequence], bool],
+        use_kernel: bool = True,
+        leaf_pairs: int = 1024,
+        kernel_min_pairs: int = 32
+    ) -> bool:
+        other_chains = list(zip(other.chains, other.chain_envelopes))
+        
+        for (start0, end0), env0 in zip(self.chains, self.chain_envelopes):
+            for (start1, end1), env1 in other_chains:
+                if not self._envelopes_overlap(env0, env1):
+                    continue
+                if self._chains_intersect(
+                    start0, end0, other, start1, end1, segment_test,
+                    use_kernel, leaf_pairs, kernel_min_pairs
+                ):
+                    return True
+        
+        return False
+    
+    def _chains_intersect(
+        self,
+        start0: int,
+        end0: int,
+        other: 'MonotoneChainIndex',
+        start1: int,
+        end1: int,
+        segment_test: Callable[[Sequence, Sequence, Sequence, Sequence], bool],
+        use_kernel: bool,
+        leaf_pairs: int,
+        kernel_min_pairs: int
+    ) -> bool:
+        stack = [(start0, end0, start1, end1)]
+        
+        while stack:
+            s0, e0, s1, e1 = stack.pop()
+            if not self._envelopes_overlap(self.envelope(s0, e0), other.envelope(s1, e1)):
+                continue
+            
+            pairs = (e0 - s0) * (e1 - s1)
+            if use_kernel and pairs >= kernel_min_pairs and pairs <= leaf_pairs:
+                if GeometryKernel.segments_intersect_any(
+                    self.coords[s0:e0 + 1], other.coords[s1:e1 + 1]
+                ):
+                    return True
+                continue
+            
+            if pairs == 1:
+                if segment_test(self.point(s0), self.point(e0), other.point(s1), other.point(e1)):
+                    return True
+                continue
+            
+            if e0 - s0 >= e1 - s1:
+                mid = (s0 + e0) // 2
+                stack.append((mid, e0, s1, e1))
+                stack.append((s0, mid, s1, e1))
+            else:
+                mid = (s1 + e1) // 2
+                stack.append((s0, e0, mid, e1))
+                stack.append((s0, e0, s1, mid))
+        
+        return False
+    
+    @staticmethod
+    def _envelopes_overlap(env0: Tuple, env1: Tuple) -> bool:
+        return not (
+            env0[2] < env1[0] or env0[0] > env1[2] or
+            env0[3] < env1[1] or env0[1] > env1[3]
+        )
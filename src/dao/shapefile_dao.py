@@ -1,91 +1,317 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from itertools import repeat
 import shapefile
-from typing import List, Dict, Any, Tuple
+import numpy as np
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple, Union
+from src.dao.columnar_layer import ColumnarLayer
+from src.dao.dbf_reader import DbfReader
+from src.dao.geometry_catalog import GeometryCatalog
+from src.dao.layer_snapshot import LayerSnapshotCache
+from src.dao.mapped_shape_reader import MappedShapeReader
 from src.utils.logger_util import LoggerUtil
 
 
 class ShapefileDAO:
-    def __init__(self, shapefile_path: str):
+    def __init__(
+        self,
+        shapefile_path: str,
+        use_catalog: bool = True,
+        snapshot_cache: Optional[LayerSnapshotCache] = None
+    ):
         self.shapefile_path = shapefile_path
+        self.use_catalog = use_catalog
+        self.snapshot_cache = snapshot_cache
         self.logger = LoggerUtil.get_logger(self.__class__.__name__)
     
-    def read_points(self) -> List[Dict[str, Any]]:
+    def _read_shared(
+        self,
+        kind: str,
+        loader,
+        fields: Optional[Sequence[str]] = None,
+        geometry: bool = True
+    ):
+        if not self.use_catalog:
+            return loader(fields, geometry)
+        
+        key = kind if fields is None else f"{kind}[{','.join(fields)}]"
+        if not geometry:
+            key += ':attributes'
+        return GeometryCatalog.get_layer(self.shapefile_path, key, lambda: loader(fields, geometry))
+    
+    def read_points(
+        self,
+        fields: Optional[Sequence[str]] = None,
+        geometry: bool = True
+    ) -> List[Dict[str, Any]]:
+        return self._load_points(fields, geometry)
+    
+    def read_lines(
+        self,
+        fields: Optional[Sequence[str]] = None,
+        geometry: bool = True
+    ) -> List[Dict[str, Any]]:
+        return self._read_shared('lines', self._load_lines, fields, geometry)
+    
+    def read_polygons(
+        self,
+        fields: Optional[Sequence[str]] = None,
+        geometry: bool = True
+    ) -> List[Dict[str, Any]]:
+        return self._read_shared('polygons', self._load_polygons, fields, geometry)
+    
+    def read_layer(self, fields: Optional[Sequence[str]] = None, workers: int = 1) -> ColumnarLayer:
+        return self._read_shared('layer', partial(self._load_layer, workers=workers), fields)
+    
+    def read_range(self, start: int, end: int, fields: Optional[Sequence[str]] = None) -> ColumnarLayer:
         try:
-            self.logger.info(f"读取Shapefile: {self.shapefile_path}")
+            if MappedShapeReader.supports(MappedShapeReader.read_shape_type(self.shapefile_path)):
+                layer = self._load_mapped_layer(fields, start, end)
+            else:
+                layer = self._load_pyshp_layer(fields, start, end)
+            layer.source = self.shapefile_path
+            return layer
             
-            sf = shapefile.Reader(self.shapefile_path, encoding='utf-8')
-            fields = [field[0] for field in sf.fields[1:]]
+        except Exception as e:
+            self.logger.error(f"读取Shapefile记录区间失败: {self.shapefile_path} [{start}, {end})", exc_info=True)
+            raise
+    
+    def record_ranges(self, shard_size: int) -> Optional[List[Tuple[int, int, int]]]:
+        if not MappedShapeReader.supports(MappedShapeReader.read_shape_type(self.shapefile_path)):
+            return None
+        
+        with DbfReader(self.shapefile_path) as dbf, MappedShapeReader(self.shapefile_path) as reader:
+            count = min(len(dbf), len(reader))
+            live = np.nonzero(~dbf.deleted[:count])[0]
+        
+        shard_size = max(1, shard_size)
+        starts = live[::shard_size].tolist()
+        ends = starts[1:] + [count]
+        sizes = [min(shard_size, len(live) - i) for i in range(0, len(live), shard_size)]
+        return list(zip(starts, ends, sizes))
+    
+    def _project_fields(self, dbf: DbfReader, fields: Optional[Sequence[str]]) -> List[str]:
+        if fields is None:
+            return dbf.field_names
+        
+        available = set(dbf.field_names)
+        missing = [name for name in fields if name not in available]
+        if missing:
+            self.logger.warning(f"字段不存在, 已忽略: {missing} ({self.shapefile_path})")
+        return [name for name in fields if name in available]
+    
+    def _load_layer(
+        self,
+        fields: Optional[Sequence[str]] = None,
+        geometry: bool = True,
+        workers: int = 1
+    ) -> ColumnarLayer:
+        try:
+            if self.snapshot_cache is not None:
+                layer = self.snapshot_cache.load(self.shapefile_path, fields)
+                if layer is not None:
+                    layer.source = self.shapefile_path
+                    return layer
             
-            records = []
-            for i, record in enumerate(sf.iterShapeRecords()):
-                attributes = record.record
-                geometry = record.shape
-                
-                if geometry.shapeType == shapefile.POINT:
-                    x, y = geometry.points[0]
-                else:
-                    x, y = None, None
-                
-                row_data = dict(zip(fields, attributes))
-                row_data['lgtd'] = x
-                row_data['lttd'] = y
-                records.append(row_data)
-                
-                if (i + 1) % 5000 == 0:
-                    self.logger.info(f"已读取 {i + 1} 条记录...")
+            self.logger.info(f"读取Shapefile: {self.shapefile_path}")
             
-            self.logger.info(f"成功读取 {len(records)} 条点记录")
-            return records
+            if workers > 1:
+                layer = self._load_sharded_layer(fields, workers)
+            elif MappedShapeReader.supports(MappedShapeReader.read_shape_type(self.shapefile_path)):
+                layer = self._load_mapped_layer(fields)
+            else:
+                layer = self._load_pyshp_layer(fields)
+            layer.source = self.shapefile_path
+            
+            self.logger.info(
+                f"成功读取 {len(layer)} 条要素 (列式存储 {layer.nbytes / 1024 / 1024:.2f} MB)"
+            )
+            if self.snapshot_cache is not None:
+                self.snapshot_cache.save(self.shapefile_path, fields, layer)
+            return layer
             
         except Exception as e:
             self.logger.error(f"读取Shapefile失败: {self.shapefile_path}", exc_info=True)
             raise
     
-    def read_lines(self) -> List[Dict[str, Any]]:
+    def _load_mapped_layer(
+        self,
+        fields: Optional[Sequence[str]] = None,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> ColumnarLayer:
+        with DbfReader(self.shapefile_path) as dbf, MappedShapeReader(self.shapefile_path) as reader:
+            names = self._project_fields(dbf, fields)
+            count = min(len(dbf), len(reader))
+            if len(dbf) != len(reader):
+                self.logger.warning(f"几何与属性记录数不一致, 按 {count} 条读取: {self.shapefile_path}")
+            end = count if end is None else min(end, count)
+            start = min(max(0, start), end)
+            
+            arrays = reader.geometry_arrays(start, end)
+            layer = ColumnarLayer(
+                reader.shape_type,
+                arrays['coords'],
+                arrays['part_offsets'],
+                arrays['feature_offsets'],
+                arrays['bboxes'],
+                dbf.columns(names, None if (start, end) == (0, len(dbf)) else np.arange(start, end))
+            )
+            keep = np.nonzero(~dbf.deleted[start:end])[0]
+        
+        if len(keep) != len(layer):
+            layer = layer.take(keep)
+        return layer
+    
+    def _load_pyshp_layer(
+        self,
+        fields: Optional[Sequence[str]] = None,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> ColumnarLayer:
+        with shapefile.Reader(self.shapefile_path, encoding='utf-8') as sf:
+            all_fields = [field[0] for field in sf.fields[1:]]
+            names = all_fields if fields is None else [name for name in fields if name in all_fields]
+            end = len(sf) if end is None else min(end, len(sf))
+            rows = [(i, sf.record(i, fields=names)) for i in range(start, end)]
+            rows = [(i, record) for i, record in rows if record is not None]
+            return ColumnarLayer.from_shapes(
+                sf.shapeType,
+                [sf.shape(i) for i, _ in rows],
+                [record for _, record in rows],
+                names
+            )
+    
+    def _load_sharded_layer(self, fields: Optional[Sequence[str]], workers: int) -> ColumnarLayer:
+        with MappedShapeReader(self.shapefile_path) as reader:
+            count = len(reader)
+        shard_size = -(-count // workers)
+        starts = list(range(0, count, max(1, shard_size)))
+        
+        self.logger.info(f"分片并行读取: {len(starts)} 个分片, 进程数 {min(workers, len(starts))}")
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(starts)))) as executor:
+            shards = list(executor.map(
+                _read_layer_range,
+                repeat(self.shapefile_path),
+                starts,
+                [start + shard_size for start in starts],
+                repeat(fields)
+            ))
+        return ColumnarLayer.concat(shards)
+    
+    def _load_points(self, fields: Optional[Sequence[str]] = None, geometry: bool = True) -> List[Dict[str, Any]]:
         try:
             self.logger.info(f"读取Shapefile: {self.shapefile_path}")
             
-            sf = shapefile.Reader(self.shapefile_path, encoding='utf-8')
-            fields = [field[0] for field in sf.fields[1:]]
-            
             records = []
-            for i, record in enumerate(sf.iterShapeRecords()):
-                attributes = record.record
-                geometry = record.shape
-                
-                row_data = dict(zip(fields, attributes))
-                row_data['geometry'] = geometry
-                records.append(row_data)
+            for chunk in self.iter_point_chunks(5000, fields, geometry):
+                records.extend(chunk)
+                if len(chunk) == 5000:
+                    self.logger.info(f"已读取 {len(records)} 条记录...")
             
-            self.logger.info(f"成功读取 {len(records)} 条线记录")
+            self.logger.info(f"成功读取 {len(records)} 条点记录")
             return records
             
         except Exception as e:
             self.logger.error(f"读取Shapefile失败: {self.shapefile_path}", exc_info=True)
             raise
     
-    def read_polygons(self) -> List[Dict[str, Any]]:
+    def iter_point_chunks(
+        self,
+        chunk_size: int = 5000,
+        fields: Optional[Sequence[str]] = None,
+        geometry: bool = True
+    ) -> Iterator[List[Dict[str, Any]]]:
+        mapped = MappedShapeReader.supports(MappedShapeReader.read_shape_type(self.shapefile_path))
+        if not mapped:
+            self.logger.info(f"几何类型不支持内存映射读取, 改用pyshp: {self.shapefile_path}")
+        
+        with DbfReader(self.shapefile_path) as dbf, (
+            MappedShapeReader(self.shapefile_path) if mapped else nullcontext(self._read_shapes())
+        ) as reader:
+            fields = self._project_fields(dbf, fields)
+            count = min(len(dbf), len(reader))
+            rows = np.nonzero(~dbf.deleted[:count])[0]
+            
+            for start in range(0, len(rows), max(1, chunk_size)):
+                chunk_rows = rows[start:start + chunk_size]
+                columns = [dbf.column(name, chunk_rows) for name in fields]
+                columns = [values.tolist() if isinstance(values, np.ndarray) else values for values in columns]
+                
+                records = [
+                    dict(zip(fields, attributes))
+                    for attributes in (zip(*columns) if columns else [()] * len(chunk_rows))
+                ]
+                if geometry:
+                    xs, ys = self._point_coords(reader, chunk_rows)
+                    for i, row_data in enumerate(records):
+                        row_data['lgtd'] = xs[i]
+                        row_data['lttd'] = ys[i]
+                yield records
+    
+    def _point_coords(self, reader: Union[MappedShapeReader, List[Any]], rows: np.ndarray) -> Tuple[List, List]:
+        if not isinstance(reader, MappedShapeReader):
+            points = [
+                reader[row].points[0] if reader[row].shapeType == shapefile.POINT else (None, None)
+                for row in rows.tolist()
+            ]
+            return [x for x, _ in points], [y for _, y in points]
+        
+        is_point = reader.record_types[rows] == shapefile.POINT
+        xs = [None] * len(rows)
+        ys = [None] * len(rows)
+        for i in np.nonzero(is_point)[0].tolist():
+            x, y = reader.points(int(rows[i]))[0].tolist()
+            xs[i] = x
+            ys[i] = y
+        return xs, ys
+    
+    def _load_lines(self, fields: Optional[Sequence[str]] = None, geometry: bool = True) -> List[Dict[str, Any]]:
+        records = self._load_features(fields, geometry)
+        self.logger.info(f"成功读取 {len(records)} 条线记录")
+        return records
+    
+    def _load_polygons(self, fields: Optional[Sequence[str]] = None, geometry: bool = True) -> List[Dict[str, Any]]:
+        records = self._load_features(fields, geometry)
+        self.logger.info(f"成功读取 {len(records)} 条面记录")
+        return records
+    
+    def _load_features(self, fields: Optional[Sequence[str]], geometry: bool) -> List[Dict[str, Any]]:
         try:
             self.logger.info(f"读取Shapefile: {self.shapefile_path}")
             
-            sf = shapefile.Reader(self.shapefile_path, encoding='utf-8')
-            fields = [field[0] for field in sf.fields[1:]]
+            shapes = self._read_shapes() if geometry else None
+            with DbfReader(self.shapefile_path) as dbf:
+                names = self._project_fields(dbf, fields)
+                count = len(dbf) if shapes is None else min(len(dbf), len(shapes))
+                rows = np.nonzero(~dbf.deleted[:count])[0]
+                columns = [dbf.column(name, rows) for name in names]
+                columns = [values.tolist() if isinstance(values, np.ndarray) else values for values in columns]
             
-            records = []
-            for i, record in enumerate(sf.iterShapeRecords()):
-                attributes = record.record
-                geometry = record.shape
-                
-                row_data = dict(zip(fields, attributes))
-                row_data['geometry'] = geometry
-                records.append(row_data)
+            records = [
+                dict(zip(names, attributes))
+                for attributes in (zip(*columns) if columns else [()] * len(rows))
+            ]
+            if shapes is not None:
+                for row_data, row in zip(records, rows.tolist()):
+                    row_data['geometry'] = shapes[row]
             
-            self.logger.info(f"成功读取 {len(records)} 条面记录")
             return records
             
         except Exception as e:
             self.logger.error(f"读取Shapefile失败: {self.shapefile_path}", exc_info=True)
             raise
     
+    def _read_shapes(self) -> List[Any]:
+        base = os.path.splitext(self.shapefile_path)[0]
+        with open(base + '.shp', 'rb') as shp:
+            if not os.path.exists(base + '.shx'):
+                return shapefile.Reader(shp=shp).shapes()
+            with open(base + '.shx', 'rb') as shx:
+                return shapefile.Reader(shp=shp, shx=shx).shapes()
+    
     def get_field_names(self) -> List[str]:
         try:
             sf = shapefile.Reader(self.shapefile_path, encoding='utf-8')
@@ -101,3 +327,12 @@ class ShapefileDAO:
         except Exception as e:
             self.logger.error(f"获取要素数量失败: {self.shapefile_path}", exc_info=True)
             raise
+
+
+def _read_layer_range(
+    shapefile_path: str,
+    start: int,
+    end: int,
+    fields: Optional[Sequence[str]] = None
+) -> ColumnarLayer:
+    return ShapefileDAO(shapefile_path, use_catalog=False).read_range(start, end, fields)
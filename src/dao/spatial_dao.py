@@ -1,11 +1,48 @@
-from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Dict, List, Optional, Tuple, Union
+from src.dao.columnar_layer import ColumnarLayer
+from src.dao.index_cache import SpatialIndexCache
+from src.dao.prepared_polygon import PreparedPolygon
+from src.dao.segment_index import MonotoneChainIndex
+from src.dao.shapefile_dao import ShapefileDAO
+from src.dao.spatial_index import GridIndex, STRTree
 from src.utils.logger_util import LoggerUtil
 import shapefile
 
 
 class SpatialDAO:
-    def __init__(self):
+    LINE_ENGINES = ('grid', 'rtree', 'brute')
+    MATCH_ORDERS = ('index', 'nearest')
+    
+    def __init__(self, use_kernel: bool = True, index_cache: Optional[SpatialIndexCache] = None):
+        self.use_kernel = use_kernel
+        self.index_cache = index_cache
         self.logger = LoggerUtil.get_logger(self.__class__.__name__)
+        self._segment_index_cache: Dict[int, Tuple[Any, MonotoneChainIndex]] = {}
+        self._prepared_polygon_cache: Dict[int, Tuple[Any, PreparedPolygon]] = {}
+    
+    def clear_cache(self):
+        self._segment_index_cache.clear()
+        self._prepared_polygon_cache.clear()
+    
+    def _get_segment_index(self, geometry) -> MonotoneChainIndex:
+        cached = self._segment_index_cache.get(id(geometry))
+        if cached is not None and cached[0] is geometry:
+            return cached[1]
+        
+        index = MonotoneChainIndex(geometry.points)
+        self._segment_index_cache[id(geometry)] = (geometry, index)
+        return index
+    
+    def _get_prepared_polygon(self, geometry) -> PreparedPolygon:
+        cached = self._prepared_polygon_cache.get(id(geometry))
+        if cached is not None and cached[0] is geometry:
+            return cached[1]
+        
+        prepared = PreparedPolygon(geometry.points, getattr(geometry, 'parts', None))
+        self._prepared_polygon_cache[id(geometry)] = (geometry, prepared)
+        return prepared
     
     def check_line_intersects_line(self, line1, line2) -> bool:
         try:
@@ -17,18 +54,10 @@ class SpatialDAO:
             if bbox1[3] < bbox2[1] or bbox1[1] > bbox2[3]:
                 return False
             
-            points1 = line1.points
-            points2 = line2.points
+            index1 = self._get_segment_index(line1)
+            index2 = self._get_segment_index(line2)
             
-            for i in range(len(points1) - 1):
-                for j in range(len(points2) - 1):
-                    if self._segments_intersect(
-                        points1[i], points1[i+1],
-                        points2[j], points2[j+1]
-                    ):
-                        return True
-            
-            return False
+            return index1.intersects(index2, self._segments_intersect, self.use_kernel)
             
         except Exception as e:
             self.logger.error("线段相交判断失败", exc_info=True)
@@ -44,27 +73,31 @@ class SpatialDAO:
             if bbox_line[3] < bbox_poly[1] or bbox_line[1] > bbox_poly[3]:
                 return False
             
-            line_points = line.points
-            poly_points = polygon.points
-            
-            for point in line_points:
-                if self._point_in_polygon(point, poly_points):
-                    return True
+            prepared = self._get_prepared_polygon(polygon)
+            line_index = self._get_segment_index(line)
             
-            for i in range(len(line_points) - 1):
-                for j in range(len(poly_points) - 1):
-                    if self._segments_intersect(
-                        line_points[i], line_points[i+1],
-                        poly_points[j], poly_points[j+1]
-                    ):
-                        return True
+            if prepared.contains_any(line_index.coords):
+                return True
             
-            return False
+            return prepared.intersects_line(line_index, self._segments_intersect, self.use_kernel)
             
         except Exception as e:
             self.logger.error("线面相交判断失败", exc_info=True)
             return False
     
+    def _get_bbox(self, geometry) -> Optional[Tuple[float, float, float, float]]:
+        try:
+            bbox = geometry.bbox
+            return (float(bbox[0]), float(bbox[1]), float(bbox[2]), float(bbox[3]))
+        except Exception:
+            return None
+    
+    def _get_points(self, geometry) -> Optional[List[Tuple]]:
+        try:
+            return geometry.points
+        except Exception:
+            return None
+    
     def _segments_intersect(self, p1: Tuple, p2: Tuple, p3: Tuple, p4: Tuple) -> bool:
         def ccw(A, B, C):
             return (C[1]-A[1]) * (B[0]-A[0]) > (B[1]-A[1]) * (C[0]-A[0])
@@ -92,78 +125,361 @@ class SpatialDAO:
     
     def batch_line_to_line_analysis(
         self, 
-        layer1_records: List[Dict], 
-        layer2_records: List[Dict],
+        layer1_records: Union[List[Dict], ColumnarLayer], 
+        layer2_records: Union[List[Dict], ColumnarLayer],
         key1: str = 'NUMBER',
-        key2: str = 'NUMBER'
+        key2: str = 'NUMBER',
+        engine: str = 'grid',
+        limit: Optional[int] = None,
+        order: str = 'index'
     ) -> Dict[str, List[str]]:
-        self.logger.info(f"开始线线相交分析: {len(layer1_records)} x {len(layer2_records)}")
+        self.logger.info(
+            f"开始线线相交分析: {len(layer1_records)} x {len(layer2_records)} "
+            f"(引擎: {engine}{self._describe_limit(limit, order)})"
+        )
         
-        result = {}
-        total = len(layer1_records)
-        
-        for idx, rec1 in enumerate(layer1_records):
-            geom1 = rec1['geometry']
-            key1_val = rec1.get(key1)
-            
-            if not key1_val:
-                continue
-            
-            intersecting = []
-            for rec2 in layer2_records:
-                geom2 = rec2['geometry']
-                key2_val = rec2.get(key2)
-                
-                if not key2_val:
-                    continue
-                
-                if self.check_line_intersects_line(geom1, geom2):
-                    intersecting.append(key2_val)
-            
-            if intersecting:
-                result[key1_val] = intersecting
-            
-            if (idx + 1) % 50 == 0:
-                self.logger.info(f"已处理 {idx + 1}/{total}")
+        items, find_candidates = self._prepare_line_join(layer2_records, key2, engine)
+        result = self._run_join(
+            layer1_records, key1, items, find_candidates, self.check_line_intersects_line, limit, order
+        )
         
         self.logger.info(f"线线相交分析完成，找到 {len(result)} 个相交关系")
         return result
     
     def batch_line_to_polygon_analysis(
         self,
-        line_records: List[Dict],
-        polygon_records: List[Dict],
+        line_records: Union[List[Dict], ColumnarLayer],
+        polygon_records: Union[List[Dict], ColumnarLayer],
         line_key: str = 'NUMBER',
-        polygon_key: str = '代码'
+        polygon_key: str = '代码',
+        limit: Optional[int] = None,
+        order: str = 'index'
     ) -> Dict[str, List[str]]:
-        self.logger.info(f"开始线面相交分析: {len(line_records)} x {len(polygon_records)}")
+        self.logger.info(
+            f"开始线面相交分析: {len(line_records)} x {len(polygon_records)}"
+            f"{self._describe_limit(limit, order)}"
+        )
         
-        result = {}
-        total = len(line_records)
+        items, find_candidates = self._prepare_polygon_join(polygon_records, polygon_key)
+        result = self._run_join(
+            line_records, line_key, items, find_candidates, self.check_line_intersects_polygon, limit, order
+        )
+        
+        self.logger.info(f"线面相交分析完成，找到 {len(result)} 个相交关系")
+        return result
+    
+    def parallel_line_to_line_analysis(
+        self,
+        layer1_records: Union[List[Dict], ColumnarLayer],
+        layer2_records: Union[List[Dict], ColumnarLayer],
+        key1: str = 'NUMBER',
+        key2: str = 'NUMBER',
+        engine: str = 'grid',
+        workers: int = 4,
+        shard_size: int = 500,
+        limit: Optional[int] = None,
+        order: str = 'index'
+    ) -> Dict[str, List[str]]:
+        self.logger.info(
+            f"开始并行线线相交分析: {len(layer1_records)} x {len(layer2_records)} "
+            f"(引擎: {engine}, 进程数: {workers}, 分片大小: {shard_size}{self._describe_limit(limit, order)})"
+        )
+        
+        result = self._run_parallel_join(
+            'line', layer1_records, layer2_records, key1, key2, engine, workers, shard_size, limit, order
+        )
+        
+        self.logger.info(f"并行线线相交分析完成，找到 {len(result)} 个相交关系")
+        return result
+    
+    def parallel_line_to_polygon_analysis(
+        self,
+        line_records: Union[List[Dict], ColumnarLayer],
+        polygon_records: Union[List[Dict], ColumnarLayer],
+        line_key: str = 'NUMBER',
+        polygon_key: str = '代码',
+        workers: int = 4,
+        shard_size: int = 500,
+        limit: Optional[int] = None,
+        order: str = 'index'
+    ) -> Dict[str, List[str]]:
+        self.logger.info(
+            f"开始并行线面相交分析: {len(line_records)} x {len(polygon_records)} "
+            f"(进程数: {workers}, 分片大小: {shard_size}{self._describe_limit(limit, order)})"
+        )
+        
+        result = self._run_parallel_join(
+            'polygon', line_records, polygon_records, line_key, polygon_key, None, workers, shard_size,
+            limit, order
+        )
+        
+        self.logger.info(f"并行线面相交分析完成，找到 {len(result)} 个相交关系")
+        return result
+    
+    def _describe_limit(self, limit: Optional[int], order: str) -> str:
+        if order not in self.MATCH_ORDERS:
+            raise ValueError(f"不支持的候选排序方式: {order}")
+        if limit is None:
+            return ''
+        if limit < 1:
+            raise ValueError(f"匹配数量上限必须大于0: {limit}")
+        return f", 每条线最多 {limit} 个匹配, 排序: {order}"
+    
+    def _order_candidates(self, geometry, candidates: List[int], items: List[Tuple], order: str) -> List[int]:
+        if order == 'index' or len(candidates) < 2:
+            return candidates
+        
+        bbox = self._get_bbox(geometry)
+        if bbox is None:
+            return candidates
+        cx = (bbox[0] + bbox[2]) / 2
+        cy = (bbox[1] + bbox[3]) / 2
+        
+        def distance(item_idx):
+            item_bbox = self._get_bbox(items[item_idx][1])
+            if item_bbox is None:
+                return (float('inf'), item_idx)
+            dx = (item_bbox[0] + item_bbox[2]) / 2 - cx
+            dy = (item_bbox[1] + item_bbox[3]) / 2 - cy
+            return (dx * dx + dy * dy, item_idx)
         
-        for idx, line_rec in enumerate(line_records):
-            line_geom = line_rec['geometry']
-            line_key_val = line_rec.get(line_key)
+        return sorted(candidates, key=distance)
+    
+    def _prepare_join(self, kind: str, records: List[Dict], key: str, engine: Optional[str] = None):
+        if kind == 'line':
+            items, find_candidates = self._prepare_line_join(records, key, engine or 'grid')
+            return items, find_candidates, self.check_line_intersects_line
+        if kind == 'polygon':
+            items, find_candidates = self._prepare_polygon_join(records, key)
+            return items, find_candidates, self.check_line_intersects_polygon
+        raise ValueError(f"不支持的分析类型: {kind}")
+    
+    def _keyed_geometries(self, records: Union[List[Dict], ColumnarLayer], key: str) -> List[Tuple]:
+        if isinstance(records, ColumnarLayer):
+            return list(zip(records.column(key), records.geometries()))
+        return [(rec.get(key), rec['geometry']) for rec in records]
+    
+    def _prepare_line_join(self, records: Union[List[Dict], ColumnarLayer], key: str, engine: str):
+        lines = self._keyed_geometries(records, key)
+        
+        if engine == 'brute':
+            valid = [i for i, (key_val, _) in enumerate(lines) if key_val]
+            return lines, lambda geometry: valid
+        
+        if engine == 'rtree':
+            tree = STRTree([
+                self._get_bbox(geometry) if key_val else None
+                for key_val, geometry in lines
+            ])
+            self.logger.info(f"空间索引构建完成: {len(tree)} 个线要素")
+            
+            def find_in_tree(geometry):
+                bbox = self._get_bbox(geometry)
+                return tree.query(bbox) if bbox is not None else []
             
-            if not line_key_val:
+            return lines, find_in_tree
+        
+        if engine == 'grid':
+            grid = GridIndex([
+                self._get_points(geometry) if key_val else None
+                for key_val, geometry in lines
+            ])
+            self.logger.info(f"网格索引构建完成: {len(grid)} 个线要素, 网格大小 {grid.cell_size:.6f}")
+            
+            return lines, lambda geometry: grid.query_line(self._get_points(geometry))
+        
+        raise ValueError(f"不支持的线线分析引擎: {engine}")
+    
+    def _prepare_polygon_join(self, records: Union[List[Dict], ColumnarLayer], key: str):
+        polygons = self._keyed_geometries(records, key)
+        tree = self._load_polygon_index(records, key)
+        
+        if tree is None:
+            boxes = [
+                self._get_bbox(geometry) if key_val else None
+                for key_val, geometry in polygons
+            ]
+            
+            tree = STRTree(boxes)
+            self.logger.info(f"空间索引构建完成: {len(tree)} 个面要素")
+            self._save_polygon_index(records, key, polygons, boxes, tree)
+        
+        def find_in_tree(geometry):
+            bbox = self._get_bbox(geometry)
+            return tree.query(bbox) if bbox is not None else []
+        
+        return polygons, find_in_tree
+    
+    def _load_polygon_index(self, records: Union[List[Dict], ColumnarLayer], key: str) -> Optional[STRTree]:
+        source = getattr(records, 'source', None)
+        if self.index_cache is None or source is None:
+            return None
+        
+        geometries = records.geometries()
+        loaded = self.index_cache.load_polygon_index(source, key, geometries)
+        if loaded is None:
+            return None
+        
+        tree, prepared = loaded
+        for geometry, polygon in zip(geometries, prepared):
+            if polygon is not None:
+                self._prepared_polygon_cache[id(geometry)] = (geometry, polygon)
+        self.logger.info(f"空间索引加载完成: {len(tree)} 个面要素")
+        return tree
+    
+    def _save_polygon_index(
+        self,
+        records: Union[List[Dict], ColumnarLayer],
+        key: str,
+        polygons: List[Tuple],
+        boxes: List[Optional[Tuple[float, float, float, float]]],
+        tree: STRTree
+    ):
+        source = getattr(records, 'source', None)
+        if self.index_cache is None or source is None:
+            return
+        
+        prepared = [
+            self._get_prepared_polygon(geometry) if bbox is not None else None
+            for (_, geometry), bbox in zip(polygons, boxes)
+        ]
+        self.index_cache.save_polygon_index(source, key, tree, prepared)
+    
+    def _run_join(
+        self,
+        records: List[Dict],
+        key: str,
+        items: List[Tuple],
+        find_candidates,
+        predicate,
+        limit: Optional[int] = None,
+        order: str = 'index'
+    ) -> Dict[str, List[str]]:
+        result = {}
+        total = len(records)
+        
+        for idx, (key_val, geometry) in enumerate(self._keyed_geometries(records, key)):
+            if not key_val:
                 continue
             
             intersecting = []
-            for poly_rec in polygon_records:
-                poly_geom = poly_rec['geometry']
-                poly_key_val = poly_rec.get(polygon_key)
+            for item_idx in self._order_candidates(geometry, find_candidates(geometry), items, order):
+                item_key_val, item_geometry = items[item_idx]
                 
-                if not poly_key_val:
-                    continue
-                
-                if self.check_line_intersects_polygon(line_geom, poly_geom):
-                    intersecting.append(poly_key_val)
+                if predicate(geometry, item_geometry):
+                    intersecting.append(item_key_val)
+                    if limit is not None and len(intersecting) >= limit:
+                        break
             
             if intersecting:
-                result[line_key_val] = intersecting
+                result[key_val] = intersecting
             
             if (idx + 1) % 50 == 0:
                 self.logger.info(f"已处理 {idx + 1}/{total}")
         
-        self.logger.info(f"线面相交分析完成，找到 {len(result)} 个相交关系")
         return result
+    
+    def _run_parallel_join(
+        self,
+        kind: str,
+        records: List[Dict],
+        other_records: List[Dict],
+        key: str,
+        other_key: str,
+        engine: Optional[str],
+        workers: int,
+        shard_size: int,
+        limit: Optional[int] = None,
+        order: str = 'index'
+    ) -> Dict[str, List[str]]:
+        shard_size = max(1, shard_size)
+        ranges = self._record_ranges(records, shard_size)
+        if ranges is not None:
+            shards = [(records.source, start, end) for start, end, _ in ranges]
+            run_shard = _run_join_range
+            self.logger.info(f"工作进程按记录区间读取各自分片: {records.source}")
+        elif isinstance(records, ColumnarLayer):
+            shards = [records.slice(i, i + shard_size) for i in range(0, len(records), shard_size)]
+            run_shard = _run_join_shard
+        else:
+            shards = [records[i:i + shard_size] for i in range(0, len(records), shard_size)]
+            run_shard = _run_join_shard
+        if not shards:
+            return {}
+        
+        if kind == 'polygon' and self.index_cache is not None:
+            self._prepare_polygon_join(other_records, other_key)
+        
+        result = {}
+        with ProcessPoolExecutor(
+            max_workers=max(1, min(workers, len(shards))),
+            initializer=_init_join_worker,
+            initargs=(kind, other_records, other_key, engine, self.use_kernel, self.index_cache)
+        ) as executor:
+            shard_results = executor.map(
+                run_shard, shards, repeat(key), repeat(limit), repeat(order)
+            )
+            for shard_idx, shard_result in enumerate(shard_results):
+                result.update(shard_result)
+                self.logger.info(f"分片 {shard_idx + 1}/{len(shards)} 完成")
+        
+        return result
+    
+    def _record_ranges(
+        self,
+        records: Union[List[Dict], ColumnarLayer],
+        shard_size: int
+    ) -> Optional[List[Tuple[int, int, int]]]:
+        if not isinstance(records, ColumnarLayer) or records.source is None:
+            return None
+        
+        try:
+            ranges = ShapefileDAO(records.source, use_catalog=False).record_ranges(shard_size)
+        except Exception as e:
+            self.logger.warning(f"无法按记录区间分片, 改为传递分片数据: {records.source}", exc_info=True)
+            return None
+        
+        if ranges is None or sum(size for _, _, size in ranges) != len(records):
+            return None
+        return ranges
+
+
+_join_worker_state: Dict[str, Any] = {}
+
+
+def _init_join_worker(
+    kind: str,
+    records: List[Dict],
+    key: str,
+    engine: Optional[str],
+    use_kernel: bool,
+    index_cache: Optional[SpatialIndexCache] = None
+):
+    dao = SpatialDAO(use_kernel=use_kernel, index_cache=index_cache)
+    items, find_candidates, predicate = dao._prepare_join(kind, records, key, engine)
+    _join_worker_state.update(
+        dao=dao, items=items, find_candidates=find_candidates, predicate=predicate
+    )
+
+
+def _run_join_shard(
+    records: List[Dict],
+    key: str,
+    limit: Optional[int] = None,
+    order: str = 'index'
+) -> Dict[str, List[str]]:
+    state = _join_worker_state
+    return state['dao']._run_join(
+        records, key, state['items'], state['find_candidates'], state['predicate'], limit, order
+    )
+
+
+def _run_join_range(
+    shard: Tuple[str, int, int],
+    key: str,
+    limit: Optional[int] = None,
+    order: str = 'index'
+) -> Dict[str, List[str]]:
+    source, start, end = shard
+    records = ShapefileDAO(source, use_catalog=False).read_range(start, end, [key])
+    return _run_join_shard(records, key, limit, order)
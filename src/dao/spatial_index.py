@@ -0,0 +1,265 @@
+import math
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+from src.dao.geometry_kernel import GeometryKernel
+
+
+BBox = Tuple[float, float, float, float]
+
+
+class STRTree:
+    def __init__(self, boxes: Sequence[Optional[BBox]], node_capacity: int = 16):
+        self.node_capacity = max(2, node_capacity)
+        self._item_ids = np.empty(0, dtype=np.int64)
+        self._item_boxes = np.empty((0, 4), dtype=np.float64)
+        self._node_boxes = np.empty((0, 4), dtype=np.float64)
+        self._node_ranges = np.empty((0, 2), dtype=np.int64)
+        self._leaf_count = 0
+        self._root = -1
+        self._build(boxes)
+    
+    def __len__(self) -> int:
+        return len(self._item_ids)
+    
+    def _build(self, boxes: Sequence[Optional[BBox]]):
+        ids = [i for i, box in enumerate(boxes) if box is not None]
+        if not ids:
+            return
+        
+        order = self._str_order([boxes[i] for i in ids])
+        item_ids = [ids[k] for k in order]
+        item_boxes = [tuple(boxes[i]) for i in item_ids]
+        node_boxes: List[BBox] = []
+        node_ranges: List[Tuple[int, int]] = []
+        
+        level = self._pack(item_boxes, 0)
+        is_leaf_level = True
+        
+        while len(level) > 1:
+            order = self._str_order([node[0] for node in level])
+            level = [level[k] for k in order]
+            base = len(node_boxes)
+            self._append_level(level, node_boxes, node_ranges)
+            if is_leaf_level:
+                self._leaf_count = len(level)
+                is_leaf_level = False
+            level = self._pack([node[0] for node in level], base)
+        
+        if is_leaf_level:
+            self._leaf_count = 1
+        self._root = len(node_boxes)
+        self._append_level(level, node_boxes, node_ranges)
+        
+        self._item_ids = np.array(item_ids, dtype=np.int64)
+        self._item_boxes = np.array(item_boxes, dtype=np.float64).reshape(-1, 4)
+        self._node_boxes = np.array(node_boxes, dtype=np.float64).reshape(-1, 4)
+        self._node_ranges = np.array(node_ranges, dtype=np.int64).reshape(-1, 2)
+    
+    def _append_level(
+        self,
+        level: List[Tuple[BBox, int, int]],
+        node_boxes: List[BBox],
+        node_ranges: List[Tuple[int, int]]
+    ):
+        for box, start, end in level:
+            node_boxes.append(box)
+            node_ranges.append((start, end))
+    
+    def _str_order(self, boxes: List[BBox]) -> List[int]:
+        n = len(boxes)
+        capacity = self.node_capacity
+        if n <= capacity:
+            return list(range(n))
+        
+        leaf_pages = math.ceil(n / capacity)
+        slice_count = math.ceil(math.sqrt(leaf_pages))
+        slice_size = slice_count * capacity
+        
+        by_x = sorted(range(n), key=lambda k: boxes[k][0] + boxes[k][2])
+        order = []
+        for start in range(0, n, slice_size):
+            chunk = by_x[start:start + slice_size]
+            chunk.sort(key=lambda k: boxes[k][1] + boxes[k][3])
+            order.extend(chunk)
+        return order
+    
+    def _pack(self, boxes: List[BBox], base: int) -> List[Tuple[BBox, int, int]]:
+        nodes = []
+        for start in range(0, len(boxes), self.node_capacity):
+            group = boxes[start:start + self.node_capacity]
+            box = (
+                min(b[0] for b in group),
+                min(b[1] for b in group),
+                max(b[2] for b in group),
+                max(b[3] for b in group)
+            )
+            nodes.append((box, base + start, base + start + len(group)))
+        return nodes
+    
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            'item_ids': self._item_ids,
+            'item_boxes': self._item_boxes,
+            'node_boxes': self._node_boxes,
+            'node_ranges': self._node_ranges,
+            'meta': np.array([self.node_capacity, self._leaf_count, self._root], dtype=np.int64)
+        }
+    
+    @staticmethod
+    def from_arrays(arrays: Dict[str, np.ndarray]) -> 'STRTree':
+        tree = STRTree.__new__(STRTree)
+        node_capacity, leaf_count, root = np.asarray(arrays['meta']).tolist()
+        tree.node_capacity = node_capacity
+        tree._leaf_count = leaf_count
+        tree._root = root
+        tree._item_ids = np.asarray(arrays['item_ids'])
+        tree._item_boxes = np.asarray(arrays['item_boxes'])
+        tree._node_boxes = np.asarray(arrays['node_boxes'])
+        tree._node_ranges = np.asarray(arrays['node_ranges'])
+        return tree
+    
+    def query(self, bbox: BBox) -> List[int]:
+        if self._root < 0:
+            return []
+        
+        minx, miny, maxx, maxy = bbox
+        box = self._node_boxes[self._root]
+        if box[2] < minx or box[0] > maxx or box[3] < miny or box[1] > maxy:
+            return []
+        
+        low = np.array([minx, miny])
+        high = np.array([maxx, maxy])
+        spans = [self._node_ranges[self._root].tolist()]
+        leaf_level = self._root < self._leaf_count
+        while True:
+            if len(spans) == 1:
+                children = np.arange(*spans[0])
+            else:
+                children = np.concatenate([np.arange(start, end) for start, end in spans])
+            boxes = (self._item_boxes if leaf_level else self._node_boxes)[children]
+            children = children[(boxes[:, 2:] >= low).all(axis=1) & (boxes[:, :2] <= high).all(axis=1)]
+            if leaf_level:
+                return np.sort(self._item_ids[children]).tolist()
+            if len(children) == 0:
+                return []
+            leaf_level = int(children[0]) < self._leaf_count
+            spans = self._node_ranges[children].tolist()
+
+
+class GridIndex:
+    def __init__(
+        self,
+        geometries: Sequence[Optional[Sequence[Sequence[float]]]],
+        cell_size: Optional[float] = None,
+        max_cells: int = 1 << 20
+    ):
+        self.max_cells = max(1, max_cells)
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._origin = (0.0, 0.0)
+        self._shape = (0, 0)
+        self.cell_size = 0.0
+        self._size = 0
+        self._build(geometries, cell_size)
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def _build(self, geometries, cell_size: Optional[float]):
+        segments = []
+        for item, points in enumerate(geometries):
+            if points is None or len(points) < 2:
+                continue
+            coords = GeometryKernel.as_coords(points)
+            if len(coords) < 2:
+                continue
+            self._size += 1
+            segments.append((item, coords))
+        
+        if not segments:
+            return
+        
+        minx = min(float(coords[:, 0].min()) for _, coords in segments)
+        miny = min(float(coords[:, 1].min()) for _, coords in segments)
+        maxx = max(float(coords[:, 0].max()) for _, coords in segments)
+        maxy = max(float(coords[:, 1].max()) for _, coords in segments)
+        
+        if cell_size is None:
+            cell_size = self._auto_cell_size(segments, maxx - minx, maxy - miny)
+        
+        self.cell_size = cell_size
+        self._origin = (minx, miny)
+        self._shape = (
+            int((maxx - minx) / cell_size) + 1,
+            int((maxy - miny) / cell_size) + 1
+        )
+        
+        cells = self._cells
+        for item, coords in segments:
+            for key in self._segment_cell_keys(coords):
+                bucket = cells.get(key)
+                if bucket is None:
+                    cells[key] = [item]
+                elif bucket[-1] != item:
+                    bucket.append(item)
+    
+    def _auto_cell_size(self, segments, width: float, height: float) -> float:
+        lengths = np.concatenate([
+            np.hypot(*np.diff(coords, axis=0).T)
+            for _, coords in segments
+        ])
+        lengths = lengths[lengths > 0]
+        cell_size = float(np.median(lengths)) if len(lengths) else 0.0
+        
+        if width > 0 and height > 0:
+            cell_size = max(cell_size, math.sqrt(width * height / self.max_cells))
+        elif width > 0 or height > 0:
+            cell_size = max(cell_size, max(width, height) / self.max_cells)
+        
+        if cell_size <= 0:
+            cell_size = max(width, height, 1.0)
+        return cell_size
+    
+    def _cell_ranges(self, mins: np.ndarray, maxs: np.ndarray) -> np.ndarray:
+        nx, ny = self._shape
+        origin = np.array(self._origin)
+        upper = np.array([nx - 1, ny - 1])
+        
+        first = np.maximum(np.floor((mins - origin) / self.cell_size).astype(np.int64), 0)
+        last = np.minimum(np.floor((maxs - origin) / self.cell_size).astype(np.int64), upper)
+        return np.hstack([first, last])
+    
+    def _segment_cell_keys(self, coords: np.ndarray):
+        ranges = self._cell_ranges(
+            np.minimum(coords[:-1], coords[1:]),
+            np.maximum(coords[:-1], coords[1:])
+        )
+        for ix0, iy0, ix1, iy1 in ranges.tolist():
+            for ix in range(ix0, ix1 + 1):
+                for iy in range(iy0, iy1 + 1):
+                    yield (ix, iy)
+    
+    def query(self, bbox: BBox) -> List[int]:
+        if not self._cells:
+            return []
+        
+        ranges = self._cell_ranges(np.array([bbox[:2]]), np.array([bbox[2:]]))
+        found = set()
+        for ix0, iy0, ix1, iy1 in ranges.tolist():
+            for ix in range(ix0, ix1 + 1):
+                for iy in range(iy0, iy1 + 1):
+                    bucket = self._cells.get((ix, iy))
+                    if bucket:
+                        found.update(bucket)
+        return sorted(found)
+    
+    def query_line(self, points: Optional[Sequence[Sequence[float]]]) -> List[int]:
+        if not self._cells or points is None or len(points) < 2:
+            return []
+        
+        coords = GeometryKernel.as_coords(points)
+        found = set()
+        for key in self._segment_cell_keys(coords):
+            bucket = self._cells.get(key)
+            if bucket:
+                found.update(bucket)
+        return sorted(found)
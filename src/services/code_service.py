@@ -9,7 +9,11 @@ from src.utils.geo_util import GeoUtil
 class CodeService:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
-        self.db_dao = DatabaseDAO(ConfigUtil.get_database_config(config))
+        self.db_dao = DatabaseDAO(
+            ConfigUtil.get_database_config(config),
+            update_mode=ConfigUtil.get_batch_config(config).get('update_mode', 'executemany'),
+            write_workers=ConfigUtil.get_batch_config(config).get('write_workers', 1)
+        )
         self.logger = LoggerUtil.get_logger(self.__class__.__name__)
     
     def generate_all_codes(self) -> bool:
@@ -17,13 +21,14 @@ class CodeService:
         self.logger.info("开始生成hecd/vecd编码")
         
         try:
-            h_mapping = self._generate_h_codes()
-            v_mapping = self._generate_v_codes()
-            
-            self._update_h_surface_vecd_final(h_mapping, v_mapping)
-            
-            all_codes = list(h_mapping.values()) + list(v_mapping.values())
-            self._update_code_table(all_codes)
+            with self.db_dao.transaction():
+                h_mapping = self._generate_h_codes()
+                v_mapping = self._generate_v_codes()
+                
+                self._update_h_surface_vecd_final(h_mapping, v_mapping)
+                
+                all_codes = list(h_mapping.values()) + list(v_mapping.values())
+                self._update_code_table(all_codes)
             
             self.logger.info("hecd/vecd编码生成完成")
             return True
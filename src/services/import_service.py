@@ -1,18 +1,56 @@
-from typing import Dict, Any, List
+from contextlib import nullcontext
+from functools import partial
+from itertools import chain
+from typing import Dict, Any, Callable, ContextManager, Iterable, List
 from src.dao.database_dao import DatabaseDAO
+from src.dao.layer_loader import LayerLoader
 from src.dao.shapefile_dao import ShapefileDAO
 from src.utils.config_util import ConfigUtil
 from src.utils.logger_util import LoggerUtil
+from src.utils.pipeline_util import PipelineExecutor
 from src.constants import DM_IDENTITY_MAPPING
 
 
 class ImportService:
+    H_POINT_COLUMNS = ['hecd', 'pcode', 'cdistance', 'ele', 'lgtd', 'lttd', 'coeff', 'moditime', 'orderNo']
+    H_SURFACE_COLUMNS = ['hecd', 'channel', 'address', 'number', 'dmidentit', 'coeff', 'adcd', 'vecd', 'moditime']
+    V_POINT_COLUMNS = [
+        'vecd', 'pname', 'cdistance', 'channel', 'bele', 'ele', 'lgtd', 'lttd', 'cltype', 'moditime', 'orderNo'
+    ]
+    V_SURFACE_COLUMNS = [
+        'vecd', 'channel', 'address', 'number', 'adcd', 'cele', 'clgtd', 'clttd', 'eletype', 'method', 'moditime'
+    ]
+    SURFACE_FIELDS = ('hecd', 'vecd', '名称', '河流名', '类别', 'coeff')
+    H_POINT_FIELDS = ['hecd', 'pcode', 'cdistance', 'ele', 'coeff', 'orderNo', '名称', '河流名', '类别']
+    V_POINT_FIELDS = ['vecd', 'pname', 'cdistance', 'bele', 'orderNo', '名称', '河流名']
+    LINE_FIELDS = ['NAME', 'NUMBER']
+    
     def __init__(self, config: Dict[str, Any]):
         self.config = config
-        self.db_dao = DatabaseDAO(ConfigUtil.get_database_config(config))
+        self.db_dao = DatabaseDAO(
+            ConfigUtil.get_database_config(config),
+            write_workers=ConfigUtil.get_batch_config(config).get('write_workers', 1)
+        )
         self.field_mapping = ConfigUtil.load_field_mapping()
+        batch_config = ConfigUtil.get_batch_config(config)
+        self.stream = batch_config.get('stream', False)
+        self.chunk_size = batch_config.get('chunk_size', 5000)
+        self.bulk_load = batch_config.get('bulk_load', False)
+        self.pipeline = batch_config.get('pipeline', False)
+        self.defer_indexes = batch_config.get('defer_indexes', False)
+        self.queue_size = batch_config.get('queue_size', 4)
+        self.layer_loader = LayerLoader(batch_config.get('load_workers', 5))
         self.logger = LoggerUtil.get_logger(self.__class__.__name__)
     
+    def layer_readers(self) -> Dict[str, Callable[[], List[Dict]]]:
+        return {
+            f"{layer_name}_attributes": partial(
+                ShapefileDAO(ConfigUtil.get_shapefile_path(self.config, layer_name)).read_lines,
+                self.LINE_FIELDS, geometry=False
+            )
+            for layer_name in ('h_line', 'v_line')
+        }
+    
     def import_h_section_data(self) -> bool:
         self.logger.info("=" * 80)
         self.logger.info("开始导入横断面数据")
@@ -24,8 +62,24 @@ class ImportService:
             point_dao = ShapefileDAO(h_point_path)
             line_dao = ShapefileDAO(h_line_path)
             
-            point_records = point_dao.read_points()
-            line_records = line_dao.read_lines()
+            if self.stream:
+                self._stream_section_data(
+                    point_dao, line_dao,
+                    ConfigUtil.get_table_name(self.config, 'h_point'),
+                    ConfigUtil.get_table_name(self.config, 'h_surface'),
+                    self.H_POINT_COLUMNS, self.H_SURFACE_COLUMNS,
+                    self._prepare_h_point_data, self._prepare_h_surface_data, 'hecd',
+                    self.H_POINT_FIELDS
+                )
+                self.logger.info("横断面数据导入完成")
+                return True
+            
+            layers = self.layer_loader.load({
+                'points': partial(point_dao.read_points, self.H_POINT_FIELDS),
+                'lines': partial(line_dao.read_lines, self.LINE_FIELDS, geometry=False)
+            })
+            point_records = layers['points']
+            line_records = layers['lines']
             
             name_to_number = {rec['NAME']: rec['NUMBER'] for rec in line_records if 'NAME' in rec and 'NUMBER' in rec}
             
@@ -39,16 +93,12 @@ class ImportService:
             self.db_dao.truncate_table(h_surface_table)
             
             point_values = self._prepare_h_point_data(point_records)
-            self.db_dao.batch_insert(
-                h_point_table,
-                ['hecd', 'pcode', 'cdistance', 'ele', 'lgtd', 'lttd', 'coeff', 'moditime', 'orderNo'],
-                point_values
-            )
+            self._insert_points(h_point_table, self.H_POINT_COLUMNS, point_values)
             
             surface_values = self._prepare_h_surface_data(point_records, name_to_number)
             self.db_dao.batch_insert(
                 h_surface_table,
-                ['hecd', 'channel', 'address', 'number', 'dmidentit', 'coeff', 'adcd', 'vecd', 'moditime'],
+                self.H_SURFACE_COLUMNS,
                 surface_values
             )
             
@@ -70,8 +120,24 @@ class ImportService:
             point_dao = ShapefileDAO(v_point_path)
             line_dao = ShapefileDAO(v_line_path)
             
-            point_records = point_dao.read_points()
-            line_records = line_dao.read_lines()
+            if self.stream:
+                self._stream_section_data(
+                    point_dao, line_dao,
+                    ConfigUtil.get_table_name(self.config, 'v_point'),
+                    ConfigUtil.get_table_name(self.config, 'v_surface'),
+                    self.V_POINT_COLUMNS, self.V_SURFACE_COLUMNS,
+                    self._prepare_v_point_data, self._prepare_v_surface_data, 'vecd',
+                    self.V_POINT_FIELDS
+                )
+                self.logger.info("纵断面数据导入完成")
+                return True
+            
+            layers = self.layer_loader.load({
+                'points': partial(point_dao.read_points, self.V_POINT_FIELDS),
+                'lines': partial(line_dao.read_lines, self.LINE_FIELDS, geometry=False)
+            })
+            point_records = layers['points']
+            line_records = layers['lines']
             
             name_to_number = {rec['NAME']: rec['NUMBER'] for rec in line_records if 'NAME' in rec and 'NUMBER' in rec}
             
@@ -85,16 +151,12 @@ class ImportService:
             self.db_dao.truncate_table(v_surface_table)
             
             point_values = self._prepare_v_point_data(point_records)
-            self.db_dao.batch_insert(
-                v_point_table,
-                ['vecd', 'pname', 'cdistance', 'channel', 'bele', 'ele', 'lgtd', 'lttd', 'cltype', 'moditime', 'orderNo'],
-                point_values
-            )
+            self._insert_points(v_point_table, self.V_POINT_COLUMNS, point_values)
             
             surface_values = self._prepare_v_surface_data(point_records, name_to_number)
             self.db_dao.batch_insert(
                 v_surface_table,
-                ['vecd', 'channel', 'address', 'number', 'adcd', 'cele', 'clgtd', 'clttd', 'eletype', 'method', 'moditime'],
+                self.V_SURFACE_COLUMNS,
                 surface_values
             )
             
@@ -105,6 +167,62 @@ class ImportService:
             self.logger.error("纵断面数据导入失败", exc_info=True)
             return False
     
+    def _stream_section_data(
+        self,
+        point_dao: ShapefileDAO,
+        line_dao: ShapefileDAO,
+        point_table: str,
+        surface_table: str,
+        point_columns: List[str],
+        surface_columns: List[str],
+        prepare_points: Callable[[List[Dict]], List[tuple]],
+        prepare_surfaces: Callable[[List[Dict], Dict], List[tuple]],
+        group_key: str,
+        point_fields: List[str]
+    ):
+        line_records = line_dao.read_lines(self.LINE_FIELDS, geometry=False)
+        name_to_number = {rec['NAME']: rec['NUMBER'] for rec in line_records if 'NAME' in rec and 'NUMBER' in rec}
+        self.logger.info(f"读取到 {len(line_records)} 条线记录")
+        
+        self.db_dao.truncate_table(point_table)
+        self.db_dao.truncate_table(surface_table)
+        
+        grouped = {}
+        
+        def transform(records: List[Dict]) -> List[tuple]:
+            for rec in records:
+                key = rec.get(group_key)
+                if key not in grouped:
+                    grouped[key] = {field: rec.get(field) for field in self.SURFACE_FIELDS if field in rec}
+            return prepare_points(records)
+        
+        def write(chunks: Iterable[List[tuple]]) -> int:
+            with self._load_session(point_table):
+                if self.bulk_load:
+                    return self.db_dao.bulk_load(point_table, point_columns, chain.from_iterable(chunks))['rows']
+                return self.db_dao.stream_insert(point_table, point_columns, chunks)
+        
+        chunks = point_dao.iter_point_chunks(self.chunk_size, point_fields)
+        if self.pipeline:
+            total = PipelineExecutor(self.queue_size).run(chunks, transform, write)
+        else:
+            total = write(map(transform, chunks))
+        self.logger.info(f"流式导入 {total} 条点记录, {len(grouped)} 个断面")
+        
+        surface_values = prepare_surfaces(list(grouped.values()), name_to_number)
+        self.db_dao.batch_insert(surface_table, surface_columns, surface_values)
+    
+    def _insert_points(self, table_name: str, columns: List[str], values: List[tuple]) -> int:
+        with self._load_session(table_name):
+            if self.bulk_load:
+                return self.db_dao.bulk_load(table_name, columns, values)['rows']
+            return self.db_dao.batch_insert(table_name, columns, values)
+    
+    def _load_session(self, table_name: str) -> ContextManager:
+        if self.defer_indexes:
+            return self.db_dao.bulk_load_session(table_name)
+        return nullcontext()
+    
     def _prepare_h_point_data(self, records: List[Dict]) -> List[tuple]:
         values = []
         for rec in records:
@@ -1,6 +1,13 @@
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Optional, Union
 import json
 import os
+from functools import partial
+import numpy as np
+from src.dao.columnar_layer import ColumnarLayer
+from src.dao.feature_manifest import FeatureManifest
+from src.dao.index_cache import SpatialIndexCache
+from src.dao.layer_loader import LayerLoader
+from src.dao.layer_snapshot import LayerSnapshotCache
 from src.dao.shapefile_dao import ShapefileDAO
 from src.dao.spatial_dao import SpatialDAO
 from src.utils.config_util import ConfigUtil
@@ -8,86 +15,298 @@ from src.utils.logger_util import LoggerUtil
 
 
 class SpatialService:
-    def __init__(self, config: Dict[str, Any]):
+    LAYER_KEYS = {'h_line': 'NUMBER', 'v_line': 'NUMBER', 'prevention_area': '代码'}
+    ANALYSES = {
+        'h_to_v': ('h_line', 'v_line'),
+        'h_to_prevention': ('h_line', 'prevention_area'),
+        'v_to_prevention': ('v_line', 'prevention_area')
+    }
+    
+    def __init__(self, config: Dict[str, Any], use_cache: bool = True):
         self.config = config
-        self.spatial_dao = SpatialDAO()
+        self.spatial_config = ConfigUtil.get_spatial_config(config)
+        self.use_cache = use_cache
+        self.spatial_dao = SpatialDAO(
+            use_kernel=self.spatial_config.get('use_kernel', True),
+            index_cache=self._create_index_cache(config)
+        )
+        batch_config = ConfigUtil.get_batch_config(config)
+        self.workers = batch_config.get('workers', 1)
+        self.shard_size = batch_config.get('shard_size', 500)
+        self.layer_loader = LayerLoader(batch_config.get('load_workers', 5))
+        self.snapshot_cache = self._create_snapshot_cache(config)
+        self.incremental = self.spatial_config.get('incremental', False)
+        self.match_limit = self.spatial_config.get('match_limit')
+        self.match_order = self.spatial_config.get('match_order', 'index')
+        self.manifest = FeatureManifest(
+            os.path.join(config['output']['mapping_dir'], 'spatial_manifest.json')
+        )
         self.logger = LoggerUtil.get_logger(self.__class__.__name__)
     
+    def _create_index_cache(self, config: Dict[str, Any]) -> Optional[SpatialIndexCache]:
+        cache_config = ConfigUtil.get_cache_config(config)
+        if not self.use_cache or not cache_config.get('enabled', False):
+            return None
+        return SpatialIndexCache(
+            cache_config.get('dir', 'data/output/cache'),
+            cache_config.get('max_size_mb', 1024)
+        )
+    
+    def _create_snapshot_cache(self, config: Dict[str, Any]) -> Optional[LayerSnapshotCache]:
+        cache_config = ConfigUtil.get_cache_config(config)
+        if not self.use_cache or not cache_config.get('enabled', False) or not cache_config.get('snapshots', True):
+            return None
+        return LayerSnapshotCache(
+            cache_config.get('snapshot_dir', 'data/output/snapshots'),
+            cache_config.get('snapshot_max_size_mb', 2048)
+        )
+    
+    def _shapefile_dao(self, layer_name: str) -> ShapefileDAO:
+        return ShapefileDAO(
+            ConfigUtil.get_shapefile_path(self.config, layer_name),
+            snapshot_cache=self.snapshot_cache
+        )
+    
     def analyze_all_relationships(self) -> Dict[str, Dict]:
         self.logger.info("=" * 80)
         self.logger.info("开始空间关联分析")
         
-        results = {}
-        
-        results['h_to_v'] = self.analyze_h_to_v_relationship()
-        results['h_to_prevention'] = self.analyze_h_to_prevention_relationship()
-        results['v_to_prevention'] = self.analyze_v_to_prevention_relationship()
-        
-        self._save_mappings(results)
+        if self.incremental:
+            results = self.analyze_incremental()
+        else:
+            self.load_layers()
+            results = {}
+            
+            results['h_to_v'] = self.analyze_h_to_v_relationship()
+            results['h_to_prevention'] = self.analyze_h_to_prevention_relationship()
+            results['v_to_prevention'] = self.analyze_v_to_prevention_relationship()
+            
+            self._save_mappings(results)
         
         self.logger.info("所有空间关联分析完成")
         return results
     
+    def layer_readers(self) -> Dict[str, Callable[[], ColumnarLayer]]:
+        return {
+            layer_name: partial(self._shapefile_dao(layer_name).read_layer, [key])
+            for layer_name, key in self.LAYER_KEYS.items()
+        }
+    
+    def load_layers(self) -> Dict[str, ColumnarLayer]:
+        return self.layer_loader.load(self.layer_readers())
+    
     def analyze_h_to_v_relationship(self) -> Dict[str, List[str]]:
         self.logger.info("分析横断面与纵断面相交关系...")
         
-        h_line_path = ConfigUtil.get_shapefile_path(self.config, 'h_line')
-        v_line_path = ConfigUtil.get_shapefile_path(self.config, 'v_line')
-        
-        h_dao = ShapefileDAO(h_line_path)
-        v_dao = ShapefileDAO(v_line_path)
+        h_dao = self._shapefile_dao('h_line')
+        v_dao = self._shapefile_dao('v_line')
         
-        h_records = h_dao.read_lines()
-        v_records = v_dao.read_lines()
+        h_records = h_dao.read_layer([self.LAYER_KEYS['h_line']])
+        v_records = v_dao.read_layer([self.LAYER_KEYS['v_line']])
         
-        result = self.spatial_dao.batch_line_to_line_analysis(
-            h_records, v_records, 'NUMBER', 'NUMBER'
-        )
+        result = self._line_to_line_analysis(h_records, v_records)
         
         return result
     
     def analyze_h_to_prevention_relationship(self) -> Dict[str, List[str]]:
         self.logger.info("分析横断面与防治对象相交关系...")
         
-        h_line_path = ConfigUtil.get_shapefile_path(self.config, 'h_line')
-        prevention_path = ConfigUtil.get_shapefile_path(self.config, 'prevention_area')
-        
-        h_dao = ShapefileDAO(h_line_path)
-        p_dao = ShapefileDAO(prevention_path)
+        h_dao = self._shapefile_dao('h_line')
+        p_dao = self._shapefile_dao('prevention_area')
         
-        h_records = h_dao.read_lines()
-        p_records = p_dao.read_polygons()
+        h_records = h_dao.read_layer([self.LAYER_KEYS['h_line']])
+        p_records = p_dao.read_layer([self.LAYER_KEYS['prevention_area']])
         
-        result = self.spatial_dao.batch_line_to_polygon_analysis(
-            h_records, p_records, 'NUMBER', '代码'
-        )
+        result = self._line_to_polygon_analysis(h_records, p_records)
         
         return result
     
     def analyze_v_to_prevention_relationship(self) -> Dict[str, List[str]]:
         self.logger.info("分析纵断面与防治对象相交关系...")
         
-        v_line_path = ConfigUtil.get_shapefile_path(self.config, 'v_line')
-        prevention_path = ConfigUtil.get_shapefile_path(self.config, 'prevention_area')
+        v_dao = self._shapefile_dao('v_line')
+        p_dao = self._shapefile_dao('prevention_area')
         
-        v_dao = ShapefileDAO(v_line_path)
-        p_dao = ShapefileDAO(prevention_path)
+        v_records = v_dao.read_layer([self.LAYER_KEYS['v_line']])
+        p_records = p_dao.read_layer([self.LAYER_KEYS['prevention_area']])
         
-        v_records = v_dao.read_lines()
-        p_records = p_dao.read_polygons()
+        result = self._line_to_polygon_analysis(v_records, p_records)
         
-        result = self.spatial_dao.batch_line_to_polygon_analysis(
-            v_records, p_records, 'NUMBER', '代码'
+        return result
+    
+    def analyze_incremental(self) -> Dict[str, Dict]:
+        self.logger.info("增量空间关联分析...")
+        
+        options = {'match_limit': self.match_limit, 'match_order': self.match_order}
+        manifest = self.manifest.load()
+        if manifest and manifest.get('options') != options:
+            self.logger.info("匹配参数与上次不同, 执行全量分析")
+            manifest = {}
+        old_layers = manifest.get('layers', {})
+        
+        layers = self.load_layers()
+        entries = {
+            layer_name: FeatureManifest.hash_layer(layers[layer_name], key)
+            for layer_name, key in self.LAYER_KEYS.items()
+        }
+        
+        results = {}
+        for name, (layer1, layer2) in self.ANALYSES.items():
+            previous = self._load_previous_mapping(name, manifest)
+            old1 = self._old_entries(old_layers, layer1)
+            old2 = self._old_entries(old_layers, layer2)
+            
+            if previous is None or old1 is None or old2 is None:
+                self.logger.info(f"{name}: 没有可用的上次结果, 执行全量分析")
+                results[name] = self._analyze_pair(name, layers[layer1], layers[layer2])
+                continue
+            
+            results[name] = self._patch_mapping(
+                name, previous,
+                layers[layer1], entries[layer1], old1,
+                layers[layer2], entries[layer2], old2
+            )
+        
+        self._save_mappings(results)
+        self.manifest.save(
+            {
+                layer_name: {'key': key, 'features': entries[layer_name]}
+                for layer_name, key in self.LAYER_KEYS.items()
+            },
+            {name: FeatureManifest.file_hash(self._mapping_path(name)) for name in results},
+            options
         )
+        return results
+    
+    def _old_entries(self, old_layers: Dict[str, Any], layer_name: str) -> Optional[List[List[Any]]]:
+        layer = old_layers.get(layer_name)
+        if not layer or layer.get('key') != self.LAYER_KEYS[layer_name]:
+            return None
+        return layer.get('features')
+    
+    def _load_previous_mapping(self, name: str, manifest: Dict[str, Any]) -> Optional[Dict[str, List]]:
+        path = self._mapping_path(name)
+        expected = manifest.get('mappings', {}).get(name)
+        if expected is None or FeatureManifest.file_hash(path) != expected:
+            return None
         
-        return result
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _patch_mapping(
+        self,
+        name: str,
+        previous: Dict[str, List],
+        records1: ColumnarLayer,
+        entries1: List[List[Any]],
+        old1: List[List[Any]],
+        records2: ColumnarLayer,
+        entries2: List[List[Any]],
+        old2: List[List[Any]]
+    ) -> Dict[str, List]:
+        added1, removed1, reordered1 = FeatureManifest.diff(old1, entries1)
+        added2, removed2, reordered2 = FeatureManifest.diff(old2, entries2)
+        
+        if reordered1 or reordered2:
+            self.logger.info(f"{name}: 要素顺序发生变化, 执行全量分析")
+            return self._analyze_pair(name, records1, records2)
+        
+        keys1 = [entry[0] for entry in entries1]
+        affected = {keys1[i] for i in added1} | {old1[i][0] for i in removed1}
+        changed_boxes = [entries2[i][2] for i in added2] + [old2[i][2] for i in removed2]
+        affected |= self._keys_near(records1, keys1, changed_boxes)
+        affected = {FeatureManifest.mapping_key(key) for key in affected if key}
+        
+        self.logger.info(
+            f"{name}: 图层1 新增/变更 {len(added1)} 删除 {len(removed1)}, "
+            f"图层2 新增/变更 {len(added2)} 删除 {len(removed2)}, 需重算 {len(affected)} 个要素"
+        )
+        if not affected:
+            return previous
+        
+        indices = [
+            i for i, key in enumerate(keys1)
+            if key and FeatureManifest.mapping_key(key) in affected
+        ]
+        reanalyzed = self._analyze_pair(name, records1.take(indices), records2) if indices else {}
+        
+        merged = {key: value for key, value in previous.items() if key not in affected}
+        for key, value in reanalyzed.items():
+            merged[FeatureManifest.mapping_key(key)] = value
+        
+        order = {}
+        for i, key in enumerate(keys1):
+            if key:
+                order.setdefault(FeatureManifest.mapping_key(key), i)
+        return dict(sorted(merged.items(), key=lambda item: order.get(item[0], len(keys1))))
+    
+    def _keys_near(self, records: ColumnarLayer, keys: List[Any], boxes: List[Optional[List[float]]]) -> set:
+        bboxes = records.bboxes
+        near = np.zeros(len(keys), dtype=bool)
+        for box in boxes:
+            if box is None:
+                continue
+            near |= (
+                (bboxes[:, 0] <= box[2]) & (bboxes[:, 2] >= box[0]) &
+                (bboxes[:, 1] <= box[3]) & (bboxes[:, 3] >= box[1])
+            )
+        return {keys[i] for i in np.nonzero(near)[0].tolist()}
+    
+    def _analyze_pair(
+        self,
+        name: str,
+        records1: Union[List[Dict], ColumnarLayer],
+        records2: Union[List[Dict], ColumnarLayer]
+    ) -> Dict[str, List[str]]:
+        if name == 'h_to_v':
+            return self._line_to_line_analysis(records1, records2)
+        return self._line_to_polygon_analysis(records1, records2)
+    
+    def _line_to_line_analysis(
+        self,
+        h_records: Union[List[Dict], ColumnarLayer],
+        v_records: Union[List[Dict], ColumnarLayer]
+    ) -> Dict[str, List[str]]:
+        engine = self.spatial_config.get('line_engine', 'grid')
+        
+        if self.workers > 1:
+            return self.spatial_dao.parallel_line_to_line_analysis(
+                h_records, v_records, 'NUMBER', 'NUMBER',
+                engine=engine, workers=self.workers, shard_size=self.shard_size,
+                limit=self.match_limit, order=self.match_order
+            )
+        
+        return self.spatial_dao.batch_line_to_line_analysis(
+            h_records, v_records, 'NUMBER', 'NUMBER', engine=engine,
+            limit=self.match_limit, order=self.match_order
+        )
+    
+    def _line_to_polygon_analysis(
+        self,
+        line_records: Union[List[Dict], ColumnarLayer],
+        polygon_records: Union[List[Dict], ColumnarLayer]
+    ) -> Dict[str, List[str]]:
+        if self.workers > 1:
+            return self.spatial_dao.parallel_line_to_polygon_analysis(
+                line_records, polygon_records, 'NUMBER', '代码',
+                workers=self.workers, shard_size=self.shard_size,
+                limit=self.match_limit, order=self.match_order
+            )
+        
+        return self.spatial_dao.batch_line_to_polygon_analysis(
+            line_records, polygon_records, 'NUMBER', '代码',
+            limit=self.match_limit, order=self.match_order
+        )
+    
+    def _mapping_path(self, name: str) -> str:
+        return os.path.join(self.config['output']['mapping_dir'], f"{name}_mapping.json")
     
     def _save_mappings(self, results: Dict):
         mapping_dir = self.config['output']['mapping_dir']
         os.makedirs(mapping_dir, exist_ok=True)
         
         for key, value in results.items():
-            filepath = os.path.join(mapping_dir, f"{key}_mapping.json")
+            filepath = self._mapping_path(key)
             with open(filepath, 'w', encoding='utf-8') as f:
                 json.dump(value, f, ensure_ascii=False, indent=2)
             self.logger.info(f"保存映射文件: {filepath}")
@@ -10,7 +10,11 @@ from src.utils.logger_util import LoggerUtil
 class UpdateService:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
-        self.db_dao = DatabaseDAO(ConfigUtil.get_database_config(config))
+        self.db_dao = DatabaseDAO(
+            ConfigUtil.get_database_config(config),
+            update_mode=ConfigUtil.get_batch_config(config).get('update_mode', 'executemany'),
+            write_workers=ConfigUtil.get_batch_config(config).get('write_workers', 1)
+        )
         self.logger = LoggerUtil.get_logger(self.__class__.__name__)
     
     def update_adcd_and_vecd(self, mappings: Dict[str, Dict]) -> bool:
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import shutil
+from typing import List, Optional
+
+
+class CacheUtil:
+    SAMPLE_SIZE = 65536
+    SAMPLE_COUNT = 16
+    SHAPEFILE_EXTENSIONS = ('.shp', '.shx', '.dbf', '.cpg', '.prj')
+    
+    @staticmethod
+    def shapefile_base(shapefile_path: str) -> str:
+        base, ext = os.path.splitext(os.path.abspath(shapefile_path))
+        return base if ext.lower() == '.shp' else os.path.abspath(shapefile_path)
+    
+    @staticmethod
+    def source_id(shapefile_path: str, *extra: str) -> str:
+        hasher = hashlib.sha1(CacheUtil.shapefile_base(shapefile_path).encode('utf-8'))
+        for item in extra:
+            hasher.update(b'\0' + str(item).encode('utf-8'))
+        return hasher.hexdigest()[:12]
+    
+    @staticmethod
+    def fingerprint(shapefile_path: str, version: str = '') -> str:
+        base = CacheUtil.shapefile_base(shapefile_path)
+        hasher = hashlib.sha1(version.encode('utf-8'))
+        
+        for ext in CacheUtil.SHAPEFILE_EXTENSIONS:
+            path = base + ext
+            if not os.path.exists(path):
+                continue
+            stat = os.stat(path)
+            hasher.update(f"{ext}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+            CacheUtil._hash_samples(hasher, path, stat.st_size)
+        
+        return hasher.hexdigest()[:20]
+    
+    @staticmethod
+    def _hash_samples(hasher, path: str, size: int):
+        sample_size = CacheUtil.SAMPLE_SIZE
+        sample_count = CacheUtil.SAMPLE_COUNT
+        
+        with open(path, 'rb') as f:
+            if size <= sample_size * sample_count:
+                hasher.update(f.read())
+                return
+            
+            step = (size - sample_size) // (sample_count - 1)
+            for i in range(sample_count):
+                f.seek(i * step)
+                hasher.update(f.read(sample_size))
+    
+    @staticmethod
+    def path_size(path: str) -> int:
+        if os.path.isfile(path):
+            return os.path.getsize(path)
+        
+        total = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    continue
+        return total
+    
+    @staticmethod
+    def touch(path: str):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+    
+    @staticmethod
+    def remove(path: str):
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
+    
+    @staticmethod
+    def evict_lru(cache_dir: str, max_bytes: int, keep: Optional[str] = None) -> List[str]:
+        if not os.path.isdir(cache_dir):
+            return []
+        
+        entries = []
+        for name in os.listdir(cache_dir):
+            if name.startswith('.'):
+                continue
+            path = os.path.join(cache_dir, name)
+            entries.append((os.path.getmtime(path), CacheUtil.path_size(path), path))
+        
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            if keep is not None and os.path.abspath(path) == os.path.abspath(keep):
+                continue
+            CacheUtil.remove(path)
+            total -= size
+            removed.append(path)
+        
+        return removed
@@ -65,6 +65,14 @@ class ConfigUtil:
     def get_batch_config(config: Dict[str, Any]) -> Dict[str, int]:
         return config['batch']
     
+    @staticmethod
+    def get_spatial_config(config: Dict[str, Any]) -> Dict[str, Any]:
+        return config.get('spatial', {})
+    
+    @staticmethod
+    def get_cache_config(config: Dict[str, Any]) -> Dict[str, Any]:
+        return config.get('cache', {})
+    
     @staticmethod
     def clear_cache():
         ConfigUtil._config_cache = None
@@ -1,27 +1,247 @@
+import os
+import queue
+import re
+import threading
+from itertools import islice
 import pymysql
-from typing import Dict, Any, List, Tuple, Optional
+from pymysql.constants import CLIENT
+from typing import Dict, Any, Iterable, Iterator, List, Tuple, Optional, TextIO
 from contextlib import contextmanager
+from src.utils.logger_util import LoggerUtil
+
+
+class ConnectionPool:
+    def __init__(self, db_config: Dict[str, Any], size: int = 5, timeout: float = 30):
+        self.db_config = db_config
+        self.size = size
+        self.timeout = timeout
+        self.logger = LoggerUtil.get_logger(self.__class__.__name__)
+        self._pid = os.getpid()
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+    
+    def acquire(self):
+        self._check_pid()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"等待数据库连接超时 ({self.timeout} 秒, 连接池大小 {self.size})")
+        
+        try:
+            while True:
+                try:
+                    connection = self._idle.get_nowait()
+                except queue.Empty:
+                    return DBUtil.connect(self.db_config)
+                
+                if DBUtil.is_alive(connection):
+                    return connection
+                self.logger.warning("连接池中的连接已失效, 重新建立连接")
+                DBUtil.close_quietly(connection)
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def release(self, connection, discard: bool = False):
+        try:
+            if discard or os.getpid() != self._pid:
+                DBUtil.close_quietly(connection)
+            else:
+                self._idle.put(connection)
+        finally:
+            self._slots.release()
+    
+    def close(self):
+        while True:
+            try:
+                DBUtil.close_quietly(self._idle.get_nowait())
+            except queue.Empty:
+                return
+    
+    def _check_pid(self):
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._idle = queue.LifoQueue()
+            self._slots = threading.BoundedSemaphore(self.size)
 
 
 class DBUtil:
+    TSV_ESCAPES = {'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'}
+    TSV_UNESCAPES = {'t': '\t', 'n': '\n', 'r': '\r', '0': '\0', '\\': '\\'}
+    TSV_NULL = '\\N'
+    _pools: Dict[Tuple, ConnectionPool] = {}
+    _pools_lock = threading.Lock()
+    _local = threading.local()
+    
+    @staticmethod
+    def _config_key(db_config: Dict[str, Any]) -> Tuple:
+        return (
+            db_config['host'],
+            db_config['port'],
+            db_config['user'],
+            db_config['database'],
+            db_config.get('charset', 'utf8mb4')
+        )
+    
+    @staticmethod
+    def connect(db_config: Dict[str, Any]):
+        connection = pymysql.connect(
+            host=db_config['host'],
+            port=db_config['port'],
+            user=db_config['user'],
+            password=db_config['password'],
+            database=db_config['database'],
+            charset=db_config.get('charset', 'utf8mb4'),
+            autocommit=False,
+            local_infile=db_config.get('local_infile', False),
+            client_flag=CLIENT.FOUND_ROWS
+        )
+        try:
+            with connection.cursor() as cursor:
+                DBUtil.set_utf8mb4(cursor)
+                DBUtil.set_timeout(cursor)
+            return connection
+        except Exception:
+            DBUtil.close_quietly(connection)
+            raise
+    
+    @staticmethod
+    def is_alive(connection) -> bool:
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+    
+    @staticmethod
+    def close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+    
+    @staticmethod
+    def get_pool(db_config: Dict[str, Any]) -> Optional[ConnectionPool]:
+        size = db_config.get('pool_size', 5)
+        if not size:
+            return None
+        
+        key = DBUtil._config_key(db_config)
+        with DBUtil._pools_lock:
+            pool = DBUtil._pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(db_config, size, db_config.get('pool_timeout', 30))
+                DBUtil._pools[key] = pool
+            return pool
+    
+    @staticmethod
+    def close_pools():
+        with DBUtil._pools_lock:
+            for pool in DBUtil._pools.values():
+                pool.close()
+            DBUtil._pools.clear()
+    
+    @staticmethod
+    def _active_transactions() -> Dict[Tuple, Any]:
+        if not hasattr(DBUtil._local, 'transactions'):
+            DBUtil._local.transactions = {}
+        return DBUtil._local.transactions
+    
+    @staticmethod
+    def _active_sessions() -> Dict[Tuple, Tuple[Any, Dict[str, Any]]]:
+        if not hasattr(DBUtil._local, 'sessions'):
+            DBUtil._local.sessions = {}
+        return DBUtil._local.sessions
+    
+    @staticmethod
+    def in_transaction(db_config: Dict[str, Any]) -> bool:
+        return DBUtil._config_key(db_config) in DBUtil._active_transactions()
+    
+    @staticmethod
+    def session_variables(db_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        active = DBUtil._active_sessions().get(DBUtil._config_key(db_config))
+        return None if active is None else dict(active[1])
+    
     @staticmethod
     @contextmanager
     def get_connection(db_config: Dict[str, Any]):
-        connection = None
+        key = DBUtil._config_key(db_config)
+        active = DBUtil._active_transactions().get(key)
+        if active is None and key in DBUtil._active_sessions():
+            active = DBUtil._active_sessions()[key][0]
+        if active is not None:
+            yield active
+            return
+        
+        pool = DBUtil.get_pool(db_config)
+        if pool is None:
+            connection = None
+            try:
+                connection = DBUtil.connect(db_config)
+                yield connection
+            finally:
+                if connection:
+                    connection.close()
+            return
+        
+        connection = pool.acquire()
+        discard = False
         try:
-            connection = pymysql.connect(
-                host=db_config['host'],
-                port=db_config['port'],
-                user=db_config['user'],
-                password=db_config['password'],
-                database=db_config['database'],
-                charset=db_config.get('charset', 'utf8mb4'),
-                autocommit=False
-            )
             yield connection
         finally:
-            if connection:
-                connection.close()
+            try:
+                connection.rollback()
+            except Exception:
+                discard = True
+            pool.release(connection, discard)
+    
+    @staticmethod
+    @contextmanager
+    def transaction(db_config: Dict[str, Any]):
+        transactions = DBUtil._active_transactions()
+        key = DBUtil._config_key(db_config)
+        if key in transactions:
+            yield transactions[key]
+            return
+        
+        with DBUtil.get_connection(db_config) as connection:
+            transactions[key] = connection
+            try:
+                yield connection
+                connection.commit()
+            finally:
+                del transactions[key]
+    
+    @staticmethod
+    @contextmanager
+    def session(db_config: Dict[str, Any], variables: Dict[str, Any]):
+        sessions = DBUtil._active_sessions()
+        key = DBUtil._config_key(db_config)
+        outer = sessions.get(key)
+        
+        with DBUtil.get_connection(db_config) as connection:
+            names = list(variables)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT ' + ', '.join(f"@@SESSION.{name}" for name in names))
+                previous = dict(zip(names, cursor.fetchone()))
+                DBUtil.set_session_variables(cursor, variables)
+            
+            sessions[key] = (connection, {**(outer[1] if outer else {}), **variables})
+            try:
+                yield connection
+            finally:
+                if outer is None:
+                    del sessions[key]
+                else:
+                    sessions[key] = outer
+                try:
+                    with connection.cursor() as cursor:
+                        DBUtil.set_session_variables(cursor, previous)
+                except Exception:
+                    DBUtil.close_quietly(connection)
+    
+    @staticmethod
+    def set_session_variables(cursor, variables: Dict[str, Any]):
+        assignments = ', '.join(f"SESSION {name} = %s" for name in variables)
+        cursor.execute(f"SET {assignments}", tuple(variables.values()))
     
     @staticmethod
     def set_utf8mb4(cursor):
@@ -45,6 +265,111 @@ class DBUtil:
         where_clause = ' AND '.join([f"{col} = %s" for col in where_columns])
         return f"UPDATE {table_name} SET {set_clause} WHERE {where_clause}"
     
+    @staticmethod
+    def build_count_keys_sql(table_name: str, where_columns: List[str], key_count: int) -> str:
+        row = '(' + ', '.join(['%s'] * len(where_columns)) + ')'
+        return f"SELECT COUNT(*) FROM {table_name} WHERE ({', '.join(where_columns)}) IN ({', '.join([row] * key_count)})"
+    
+    @staticmethod
+    def build_column_types_sql(column_count: int) -> str:
+        placeholders = ', '.join(['%s'] * column_count)
+        return (
+            "SELECT COLUMN_NAME, COLUMN_TYPE, COLLATION_NAME FROM information_schema.COLUMNS "
+            f"WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME IN ({placeholders})"
+        )
+    
+    @staticmethod
+    def build_staging_table_sql(staging_table: str, set_types: List[str], where_types: List[str]) -> str:
+        column_defs = ', '.join(
+            [f"s{i} {column_type}" for i, column_type in enumerate(set_types)] +
+            [f"w{i} {column_type}" for i, column_type in enumerate(where_types)]
+        )
+        return f"CREATE TEMPORARY TABLE {staging_table} ({column_defs})"
+    
+    @staticmethod
+    def build_join_update_sql(
+        table_name: str,
+        staging_table: str,
+        set_columns: List[str],
+        where_columns: List[str]
+    ) -> str:
+        join_clause = ' AND '.join([f"t.{col} = s.w{i}" for i, col in enumerate(where_columns)])
+        set_clause = ', '.join([f"t.{col} = s.s{i}" for i, col in enumerate(set_columns)])
+        return f"UPDATE {table_name} t JOIN {staging_table} s ON {join_clause} SET {set_clause}"
+    
+    @staticmethod
+    def build_drop_index_sql(table_name: str, index_name: str) -> str:
+        return f"ALTER TABLE {table_name} DROP INDEX `{index_name}`"
+    
+    @staticmethod
+    def build_add_index_sql(table_name: str, index: Dict[str, Any]) -> str:
+        kind = {'FULLTEXT': 'FULLTEXT ', 'SPATIAL': 'SPATIAL '}.get(index['type'], 'UNIQUE ' if index['unique'] else '')
+        parts = ', '.join(
+            f"`{column}`" + (f"({sub_part})" if sub_part else '') + (' DESC' if collation == 'D' else '')
+            for column, sub_part, collation in index['columns']
+        )
+        return f"ALTER TABLE {table_name} ADD {kind}INDEX `{index['name']}` ({parts})"
+    
+    @staticmethod
+    def build_load_data_sql(table_name: str, columns: List[str]) -> str:
+        columns_str = ', '.join(columns)
+        return (
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {table_name} CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({columns_str})"
+        )
+    
+    @staticmethod
+    def format_tsv_value(value: Any) -> str:
+        if value is None:
+            return DBUtil.TSV_NULL
+        if isinstance(value, bool):
+            return '1' if value else '0'
+        if isinstance(value, float):
+            return repr(value)
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        return ''.join(DBUtil.TSV_ESCAPES.get(char, char) for char in str(value))
+    
+    @staticmethod
+    def write_tsv(rows: Iterable[Tuple], f: TextIO) -> int:
+        count = 0
+        for row in rows:
+            f.write('\t'.join(DBUtil.format_tsv_value(value) for value in row))
+            f.write('\n')
+            count += 1
+        return count
+    
+    @staticmethod
+    def parse_tsv_value(field: str) -> Optional[str]:
+        if field == DBUtil.TSV_NULL:
+            return None
+        if '\\' not in field:
+            return field
+        return re.sub(r'\\(.)', lambda m: DBUtil.TSV_UNESCAPES.get(m.group(1), m.group(1)), field)
+    
+    @staticmethod
+    def iter_batches(rows: Iterable[Tuple], batch_size: int = 1000) -> Iterator[List[Tuple]]:
+        iterator = iter(rows)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                return
+            yield batch
+    
+    @staticmethod
+    def read_tsv(path: str, batch_size: int = 1000) -> Iterator[List[Tuple]]:
+        batch = []
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for line in f:
+                if line.endswith('\n'):
+                    line = line[:-1]
+                batch.append(tuple(DBUtil.parse_tsv_value(field) for field in line.split('\t')))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+    
     @staticmethod
     def format_value_for_sql(value: Any) -> Any:
         if value is None:
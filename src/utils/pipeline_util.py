@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+from src.utils.logger_util import LoggerUtil
+
+
+class PipelineCancelled(BaseException):
+    pass
+
+
+class PipelineExecutor:
+    _END = object()
+    
+    def __init__(self, queue_size: int = 4, poll_interval: float = 0.1):
+        self.queue_size = max(1, queue_size)
+        self.poll_interval = poll_interval
+        self.timings: Dict[str, float] = {}
+        self.logger = LoggerUtil.get_logger(self.__class__.__name__)
+        self._cancelled = threading.Event()
+        self._errors: List[Tuple[str, BaseException]] = []
+    
+    def run(
+        self,
+        source: Iterable[Any],
+        transform: Callable[[Any], Any],
+        sink: Callable[[Iterable[Any]], Any]
+    ) -> Any:
+        self._cancelled = threading.Event()
+        self._errors = []
+        self.timings = {}
+        read_queue = queue.Queue(maxsize=self.queue_size)
+        write_queue = queue.Queue(maxsize=self.queue_size)
+        result = {}
+        
+        stages = [
+            ('reader', self._read, (source, read_queue)),
+            ('transform', self._transform, (transform, read_queue, write_queue)),
+            ('writer', self._write, (sink, write_queue, result))
+        ]
+        threads = [
+            threading.Thread(target=self._guard, args=(name, target, args), name=f"pipeline-{name}", daemon=True)
+            for name, target, args in stages
+        ]
+        
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        if self._errors:
+            stage, error = self._errors[0]
+            self.logger.error(f"流水线 {stage} 阶段失败, 已取消其余阶段", exc_info=error)
+            raise error
+        
+        self.logger.info(
+            f"流水线完成, 总耗时 {time.perf_counter() - start:.2f} 秒 "
+            f"(读取 {self.timings['reader']:.2f} 秒, 转换 {self.timings['transform']:.2f} 秒, "
+            f"写入 {self.timings['writer']:.2f} 秒, 队列容量 {self.queue_size})"
+        )
+        return result.get('value')
+    
+    def cancel(self):
+        self._cancelled.set()
+    
+    def _guard(self, stage: str, target: Callable, args: Tuple):
+        start = time.perf_counter()
+        try:
+            target(*args)
+        except PipelineCancelled:
+            pass
+        except BaseException as e:
+            self._errors.append((stage, e))
+            self._cancelled.set()
+        finally:
+            self.timings[stage] = time.perf_counter() - start
+    
+    def _put(self, target: queue.Queue, item: Any):
+        while not self._cancelled.is_set():
+            try:
+                target.put(item, timeout=self.poll_interval)
+                return
+            except queue.Full:
+                continue
+        raise PipelineCancelled()
+    
+    def _items(self, source: queue.Queue) -> Iterator[Any]:
+        while True:
+            if self._cancelled.is_set():
+                raise PipelineCancelled()
+            try:
+                item = source.get(timeout=self.poll_interval)
+            except queue.Empty:
+                continue
+            if item is self._END:
+                return
+            yield item
+    
+    def _read(self, source: Iterable[Any], output: queue.Queue):
+        for item in source:
+            self._put(output, item)
+        self._put(output, self._END)
+    
+    def _transform(self, transform: Callable[[Any], Any], source: queue.Queue, output: queue.Queue):
+        for item in self._items(source):
+            self._put(output, transform(item))
+        self._put(output, self._END)
+    
+    def _write(self, sink: Callable[[Iterable[Any]], Any], source: queue.Queue, result: Dict[str, Any]):
+        result['value'] = sink(self._items(source))
@@ -0,0 +1,139 @@
+import io
+import os
+import tempfile
+from contextlib import nullcontext
+from decimal import Decimal
+from unittest import mock
+import pymysql
+import pytest
+from src.dao.database_dao import DatabaseDAO
+from src.utils.db_util import DBUtil
+
+
+ROWS = [
+    (1, 'plain', None, 2.5),
+    (2, 'tab\there', 'new\nline', -0.1),
+    (3, 'back\\slash', 'carriage\rreturn', 1e-12),
+    (4, 'nul\0byte', '\\N', 3.0),
+    (5, '中文', '', Decimal('1.25')),
+    (6, True, False, b'bytes')
+]
+
+
+def expected_text(row):
+    values = []
+    for value in row:
+        if value is None:
+            values.append(None)
+        elif isinstance(value, bool):
+            values.append('1' if value else '0')
+        elif isinstance(value, float):
+            values.append(repr(value))
+        elif isinstance(value, bytes):
+            values.append(value.decode('utf-8'))
+        else:
+            values.append(str(value))
+    return tuple(values)
+
+
+def write_rows(tmp_path, rows):
+    path = tmp_path / 'rows.tsv'
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        assert DBUtil.write_tsv(rows, f) == len(rows)
+    return str(path)
+
+
+def test_escapes_round_trip(tmp_path):
+    path = write_rows(tmp_path, ROWS)
+    batches = list(DBUtil.read_tsv(path, batch_size=4))
+    assert [len(batch) for batch in batches] == [4, 2]
+    assert [row for batch in batches for row in batch] == [expected_text(row) for row in ROWS]
+
+
+def test_each_row_is_one_line(tmp_path):
+    path = write_rows(tmp_path, ROWS)
+    with open(path, 'rb') as f:
+        lines = f.read().split(b'\n')
+    assert lines[-1] == b''
+    assert len(lines) - 1 == len(ROWS)
+    assert all(line.count(b'\t') == 3 for line in lines[:-1])
+
+
+@pytest.mark.parametrize('value, text', [
+    (None, '\\N'),
+    ('\\N', '\\\\N'),
+    ('a\tb', 'a\\tb'),
+    (True, '1'),
+    (0.1, '0.1')
+])
+def test_format_tsv_value(value, text):
+    assert DBUtil.format_tsv_value(value) == text
+
+
+def test_iter_batches():
+    assert list(DBUtil.iter_batches(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(DBUtil.iter_batches([], 2)) == []
+
+
+class FakeCursor:
+    def __init__(self, reject_load):
+        self.reject_load = reject_load
+        self.inserted = []
+        self.rowcount = 0
+        self._rows = []
+    
+    def execute(self, sql, params=None):
+        if sql.startswith('SELECT @@GLOBAL.local_infile'):
+            self._rows = [(1,)]
+        elif sql.startswith('LOAD DATA'):
+            if self.reject_load:
+                raise pymysql.err.OperationalError(3948, 'Loading local data is disabled')
+            self.rowcount = sum(len(batch) for batch in DBUtil.read_tsv(params[0]))
+        elif sql.startswith('SHOW COUNT'):
+            self._rows = [(0,)]
+    
+    def executemany(self, sql, rows):
+        self.inserted.extend(rows)
+        self.rowcount = len(rows)
+    
+    def fetchone(self):
+        return self._rows[0]
+    
+    def fetchall(self):
+        return self._rows
+    
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize('reject_load', [False, True])
+def test_bulk_load_falls_back_to_spilled_file(reject_load, tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    cursor = FakeCursor(reject_load)
+    conn = mock.Mock()
+    conn.cursor.return_value = cursor
+    dao = DatabaseDAO({'host': 'h', 'port': 1, 'user': 'u', 'database': 'd', 'local_infile': True})
+    
+    with mock.patch.object(DBUtil, 'get_connection', return_value=nullcontext(conn)):
+        result = dao.bulk_load('t', ['a', 'b', 'c', 'd'], iter(ROWS), batch_size=4)
+    
+    assert result['rows'] == len(ROWS)
+    assert result['mode'] == ('executemany' if reject_load else 'load_data')
+    if reject_load:
+        assert cursor.inserted == [expected_text(row) for row in ROWS]
+    assert os.listdir(tmp_path) == []
+
+
+def test_bulk_load_copies_file_like_input(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    cursor = FakeCursor(True)
+    conn = mock.Mock()
+    conn.cursor.return_value = cursor
+    dao = DatabaseDAO({'host': 'h', 'port': 1, 'user': 'u', 'database': 'd', 'local_infile': True})
+    
+    with mock.patch.object(DBUtil, 'get_connection', return_value=nullcontext(conn)):
+        result = dao.bulk_load('t', ['a', 'b'], io.BytesIO('1\t中\n2\t\\N\n'.encode('utf-8')))
+    
+    assert result == {'rows': 2, 'warnings': 0, 'mode': 'executemany'}
+    assert cursor.inserted == [('1', '中'), ('2', None)]
+    assert os.listdir(tmp_path) == []
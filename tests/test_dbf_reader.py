@@ -0,0 +1,105 @@
+import datetime
+import struct
+import numpy as np
+import pytest
+import shapefile
+from src.dao.dbf_reader import DbfReader
+
+
+ROWS = [
+    (1, 1.5, 2.25, datetime.date(2020, 1, 2), True, 'abc'),
+    (None, None, None, None, None, None),
+    (-7, -0.125, 1000.0, datetime.date(1999, 12, 31), False, '中文'),
+    (3, 0.0, 0.0, None, True, ''),
+    (123456, 42.001, -3.5, datetime.date(2024, 2, 29), False, 'x' * 20),
+    (0, -1.0, 7.0, datetime.date(2001, 5, 6), None, ' padded')
+]
+DELETED = (2, 4)
+
+
+def mark_deleted(dbf_path, indices):
+    with open(dbf_path, 'r+b') as f:
+        header = f.read(12)
+        header_length, record_length = struct.unpack('<HH', header[8:12])
+        for index in indices:
+            f.seek(header_length + index * record_length)
+            f.write(b'*')
+
+
+@pytest.fixture
+def shapefile_path(tmp_path):
+    path = str(tmp_path / 'attributes')
+    writer = shapefile.Writer(path, shapeType=shapefile.POINT)
+    writer.field('INT', 'N', 10)
+    writer.field('REAL', 'N', 12, 3)
+    writer.field('FLOAT', 'F', 14, 4)
+    writer.field('DATE', 'D')
+    writer.field('FLAG', 'L')
+    writer.field('NAME', 'C', 20)
+    for i, row in enumerate(ROWS):
+        writer.point(i, i)
+        writer.record(*row)
+    writer.close()
+    mark_deleted(path + '.dbf', DELETED)
+    return path + '.shp'
+
+
+def pyshp_records(path):
+    with shapefile.Reader(path, encoding='utf-8') as sf:
+        names = [field[0] for field in sf.fields[1:]]
+        records = [sf.record(i) for i in range(len(sf))]
+    return names, records
+
+
+def as_list(values):
+    return values.tolist() if isinstance(values, np.ndarray) else list(values)
+
+
+def test_columns_match_pyshp(shapefile_path):
+    names, records = pyshp_records(shapefile_path)
+    with DbfReader(shapefile_path) as dbf:
+        assert dbf.field_names == names
+        assert [field.field_type for field in dbf.fields] == ['N', 'N', 'F', 'D', 'L', 'C']
+        assert len(dbf) == len(ROWS)
+        assert dbf.deleted.tolist() == [i in DELETED for i in range(len(ROWS))]
+        
+        live = np.nonzero(~dbf.deleted)[0]
+        assert live.tolist() == [i for i, record in enumerate(records) if record is not None]
+        columns = dbf.columns(rows=live)
+        for position, name in enumerate(names):
+            assert as_list(columns[name]) == [records[i][position] for i in live.tolist()]
+
+
+def test_null_values_decode_to_none(shapefile_path):
+    with DbfReader(shapefile_path) as dbf:
+        row = {name: as_list(values)[1] for name, values in dbf.columns().items()}
+    assert row['INT'] is None
+    assert row['REAL'] is None
+    assert row['FLOAT'] is None
+    assert row['DATE'] is None
+    assert row['FLAG'] is None
+
+
+def test_numeric_columns_stay_vectorised_without_nulls(shapefile_path):
+    with DbfReader(shapefile_path) as dbf:
+        rows = np.array([0, 2, 3, 4, 5])
+        ints = dbf.column('INT', rows)
+        reals = dbf.column('REAL', rows)
+    assert isinstance(ints, np.ndarray) and ints.dtype == np.int64
+    assert isinstance(reals, np.ndarray) and reals.dtype == np.float64
+    assert ints.tolist() == [1, -7, 3, 123456, 0]
+
+
+def test_projection_and_missing_field(shapefile_path):
+    with DbfReader(shapefile_path) as dbf:
+        assert list(dbf.columns(['NAME', 'INT'])) == ['NAME', 'INT']
+        with pytest.raises(KeyError):
+            dbf.column('MISSING')
+
+
+def test_close_releases_mapping(shapefile_path):
+    dbf = DbfReader(shapefile_path)
+    dbf.close()
+    assert dbf.records is None
+    assert dbf._map is None
+    assert dbf._file is None
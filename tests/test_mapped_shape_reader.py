@@ -0,0 +1,125 @@
+import struct
+from unittest import mock
+import numpy as np
+import pytest
+import shapefile
+from src.dao.mapped_shape_reader import MappedShapeReader
+from src.dao.shapefile_dao import ShapefileDAO
+
+
+POLYGON = [
+    [(0, 0), (0, 10), (10, 10), (10, 0), (0, 0)],
+    [(2, 2), (8, 2), (8, 8), (2, 8), (2, 2)]
+]
+LINES = [
+    [[(0, 0), (1, 1), (2, 0)]],
+    None,
+    [[(5, 5), (6, 7)], [(7, 7), (8, 9), (9, 8)]],
+    [[(-3, 4), (-1, 2)]],
+    None,
+    [[(10, 10), (11, 12), (13, 11), (12, 9)]]
+]
+DELETED = (3,)
+
+
+def mark_deleted(dbf_path, indices):
+    with open(dbf_path, 'r+b') as f:
+        header = f.read(12)
+        header_length, record_length = struct.unpack('<HH', header[8:12])
+        for index in indices:
+            f.seek(header_length + index * record_length)
+            f.write(b'*')
+
+
+def write_layer(path, shape_type, geometries):
+    writer = shapefile.Writer(path, shapeType=shape_type)
+    writer.field('NUMBER', 'C', 10)
+    for i, geometry in enumerate(geometries):
+        if geometry is None:
+            writer.null()
+        elif shape_type == shapefile.POINT:
+            writer.point(*geometry)
+        elif shape_type == shapefile.POLYGON:
+            writer.poly(geometry)
+        else:
+            writer.line(geometry)
+        writer.record(f"n{i}")
+    writer.close()
+    mark_deleted(path + '.dbf', DELETED)
+    return path + '.shp'
+
+
+@pytest.fixture(params=['point', 'polyline', 'polygon'])
+def shapefile_path(request, tmp_path):
+    path = str(tmp_path / request.param)
+    if request.param == 'point':
+        return write_layer(path, shapefile.POINT, [(1.5, 2.5), None, (-3, 4), (0, 0), (7.25, -8)])
+    if request.param == 'polygon':
+        return write_layer(path, shapefile.POLYGON, [POLYGON, None, [POLYGON[0]], POLYGON])
+    return write_layer(path, shapefile.POLYLINE, LINES)
+
+
+def pyshp_shapes(path):
+    with shapefile.Reader(path) as sf:
+        return sf.shapeType, list(sf.shapes())
+
+
+def test_geometry_matches_pyshp(shapefile_path):
+    shape_type, shapes = pyshp_shapes(shapefile_path)
+    with MappedShapeReader(shapefile_path) as reader:
+        assert reader.shape_type == shape_type
+        assert len(reader) == len(shapes)
+        for i, shape in enumerate(shapes):
+            expected = np.array(shape.points, dtype=np.float64).reshape(-1, 2)
+            assert np.array_equal(reader.points(i), expected)
+            if shape.shapeType == shapefile.NULL:
+                assert len(reader.parts(i)) == 0
+            elif shape_type != shapefile.POINT:
+                assert reader.parts(i).tolist() == list(shape.parts)
+
+
+def test_geometry_arrays_match_pyshp(shapefile_path):
+    _, shapes = pyshp_shapes(shapefile_path)
+    with MappedShapeReader(shapefile_path) as reader:
+        for start, end in [(0, None), (1, 3), (2, 100)]:
+            arrays = reader.geometry_arrays(start, end)
+            selected = shapes[start:end]
+            coords = arrays['coords']
+            part_offsets = arrays['part_offsets']
+            feature_offsets = arrays['feature_offsets']
+            assert len(feature_offsets) == len(selected) + 1
+            for i, shape in enumerate(selected):
+                first, last = feature_offsets[i], feature_offsets[i + 1]
+                points = coords[part_offsets[first]:part_offsets[last]]
+                assert np.array_equal(points, np.array(shape.points, dtype=np.float64).reshape(-1, 2))
+                if shape.points:
+                    assert np.allclose(arrays['bboxes'][i], [
+                        min(p[0] for p in shape.points), min(p[1] for p in shape.points),
+                        max(p[0] for p in shape.points), max(p[1] for p in shape.points)
+                    ])
+                else:
+                    assert np.isnan(arrays['bboxes'][i]).all()
+
+
+def test_dao_mapped_path_matches_pyshp_fallback(shapefile_path):
+    dao = ShapefileDAO(shapefile_path, use_catalog=False)
+    mapped = dao.read_layer(['NUMBER'])
+    with mock.patch.object(MappedShapeReader, 'supports', return_value=False):
+        fallback = dao.read_layer(['NUMBER'])
+        fallback_range = dao.read_range(1, 4, ['NUMBER'])
+    
+    assert mapped.column('NUMBER') == fallback.column('NUMBER')
+    assert 'n3' not in mapped.column('NUMBER')
+    for i in range(len(mapped)):
+        assert np.array_equal(mapped.points(i), fallback.points(i))
+        assert mapped.parts(i).tolist() == fallback.parts(i).tolist()
+    
+    mapped_range = dao.read_range(1, 4, ['NUMBER'])
+    assert mapped_range.column('NUMBER') == fallback_range.column('NUMBER') == ['n1', 'n2']
+
+
+def test_rejects_non_shapefile(tmp_path):
+    path = tmp_path / 'broken.shp'
+    path.write_bytes(b'\x00' * 100)
+    with pytest.raises(ValueError):
+        MappedShapeReader(str(path))
@@ -0,0 +1,115 @@
+import itertools
+import threading
+import pytest
+from src.utils.pipeline_util import PipelineExecutor
+
+
+class StageError(Exception):
+    pass
+
+
+def run_with_timeout(executor, source, transform, sink, timeout=10):
+    outcome = {}
+    
+    def target():
+        try:
+            outcome['value'] = executor.run(source, transform, sink)
+        except BaseException as e:
+            outcome['error'] = e
+    
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), '流水线未能在超时内结束'
+    return outcome
+
+
+def counting(source, produced):
+    for item in source:
+        produced.append(item)
+        yield item
+
+
+def test_runs_all_stages_in_order():
+    executor = PipelineExecutor(queue_size=2, poll_interval=0.01)
+    outcome = run_with_timeout(executor, range(100), lambda x: x * 2, list)
+    assert outcome == {'value': [x * 2 for x in range(100)]}
+    assert set(executor.timings) == {'reader', 'transform', 'writer'}
+
+
+def test_transform_error_cancels_reader_and_writer():
+    produced = []
+    written = []
+    
+    def transform(item):
+        if item == 5:
+            raise StageError('bad item')
+        return item
+    
+    def sink(items):
+        for item in items:
+            written.append(item)
+    
+    executor = PipelineExecutor(queue_size=2, poll_interval=0.01)
+    outcome = run_with_timeout(executor, counting(itertools.count(), produced), transform, sink)
+    assert isinstance(outcome['error'], StageError)
+    assert written == [0, 1, 2, 3, 4][:len(written)]
+    assert len(produced) < 20
+
+
+def test_writer_error_cancels_upstream():
+    produced = []
+    
+    def sink(items):
+        for item in items:
+            if item == 3:
+                raise StageError('write failed')
+    
+    executor = PipelineExecutor(queue_size=2, poll_interval=0.01)
+    outcome = run_with_timeout(executor, counting(itertools.count(), produced), lambda x: x, sink)
+    assert isinstance(outcome['error'], StageError)
+    assert len(produced) < 20
+
+
+def test_reader_error_is_raised():
+    def source():
+        yield 1
+        raise StageError('read failed')
+    
+    executor = PipelineExecutor(queue_size=1, poll_interval=0.01)
+    outcome = run_with_timeout(executor, source(), lambda x: x, list)
+    assert isinstance(outcome['error'], StageError)
+
+
+def test_first_error_wins():
+    def transform(item):
+        raise StageError('transform failed')
+    
+    def sink(items):
+        for _ in items:
+            pass
+        raise ValueError('should not be reported')
+    
+    executor = PipelineExecutor(queue_size=1, poll_interval=0.01)
+    outcome = run_with_timeout(executor, itertools.count(), transform, sink)
+    assert isinstance(outcome['error'], StageError)
+
+
+def test_external_cancel_stops_all_stages():
+    produced = []
+    executor = PipelineExecutor(queue_size=2, poll_interval=0.01)
+    
+    def sink(items):
+        for item in items:
+            if item == 10:
+                executor.cancel()
+    
+    run_with_timeout(executor, counting(itertools.count(), produced), lambda x: x, sink)
+    assert len(produced) < 30
+
+
+@pytest.mark.parametrize('queue_size', [0, 1, 8])
+def test_queue_size_is_at_least_one(queue_size):
+    executor = PipelineExecutor(queue_size=queue_size, poll_interval=0.01)
+    assert executor.queue_size == max(1, queue_size)
+    assert run_with_timeout(executor, range(10), str, ''.join) == {'value': '0123456789'}
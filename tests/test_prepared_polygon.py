@@ -0,0 +1,96 @@
+import math
+import random
+import numpy as np
+import pytest
+from src.dao.prepared_polygon import PreparedPolygon
+from src.dao.spatial_dao import SpatialDAO
+
+
+def star_ring(cx, cy, outer, inner, spikes, reverse=False):
+    ring = []
+    for i in range(spikes * 2):
+        radius = outer if i % 2 == 0 else inner
+        angle = math.pi * i / spikes
+        ring.append((cx + radius * math.cos(angle), cy + radius * math.sin(angle)))
+    ring.append(ring[0])
+    return ring[::-1] if reverse else ring
+
+
+def square_ring(x0, y0, x1, y1, reverse=False):
+    ring = [(x0, y0), (x0, y1), (x1, y1), (x1, y0), (x0, y0)]
+    return ring[::-1] if reverse else ring
+
+
+def flatten(rings):
+    points = []
+    parts = []
+    for ring in rings:
+        parts.append(len(points))
+        points.extend(ring)
+    return points, parts
+
+
+POLYGONS = {
+    'star': [star_ring(50, 50, 40, 15, 12)],
+    'star_with_hole': [star_ring(50, 50, 40, 20, 9), square_ring(40, 40, 60, 60, reverse=True)],
+    'multipart': [
+        star_ring(25, 25, 20, 8, 7),
+        square_ring(55, 10, 95, 90),
+        square_ring(65, 30, 85, 50, reverse=True),
+        square_ring(65, 60, 85, 80, reverse=True)
+    ]
+}
+
+
+def ray_casting(dao, rings, point):
+    return sum(dao._point_in_polygon(point, ring[:-1]) for ring in rings) % 2 == 1
+
+
+def sample_points(rings, count=3000, seed=0):
+    rng = random.Random(seed)
+    points = [(rng.uniform(-10, 110), rng.uniform(-10, 110)) for _ in range(count)]
+    points += [(rng.uniform(-10, 110), y) for ring in rings for _, y in ring]
+    return points
+
+
+@pytest.mark.parametrize('name', sorted(POLYGONS))
+@pytest.mark.parametrize('band_count, raster_size', [(None, None), (1, 4), (64, 128)])
+def test_contains_matches_ray_casting(name, band_count, raster_size):
+    dao = SpatialDAO()
+    rings = POLYGONS[name]
+    points, parts = flatten(rings)
+    prepared = PreparedPolygon(points, parts, band_count=band_count, raster_size=raster_size)
+    assert prepared.raster_cells is not None
+    
+    samples = sample_points(rings)
+    expected = np.array([ray_casting(dao, rings, point) for point in samples])
+    assert expected.any() and not expected.all()
+    assert np.array_equal(prepared.contains_points(samples), expected)
+    assert np.array_equal(prepared._contains_exact(np.array(samples)), expected)
+    assert prepared.contains_any(samples)
+
+
+def test_round_trips_through_arrays():
+    rings = POLYGONS['multipart']
+    points, parts = flatten(rings)
+    prepared = PreparedPolygon(points, parts)
+    loaded = PreparedPolygon.from_arrays(points, parts, **prepared.to_arrays())
+    samples = sample_points(rings, seed=1)
+    assert np.array_equal(loaded.contains_points(samples), prepared.contains_points(samples))
+
+
+def test_holes_and_gaps_are_outside():
+    points, parts = flatten(POLYGONS['multipart'])
+    prepared = PreparedPolygon(points, parts)
+    assert prepared.contains((60, 20))
+    assert not prepared.contains((75, 40))
+    assert not prepared.contains((75, 70))
+    assert not prepared.contains((50, 95))
+    assert not prepared.contains_any([(75, 40), (200, 200)])
+
+
+def test_unclosed_rings_are_closed():
+    closed = square_ring(0, 0, 10, 10)
+    prepared = PreparedPolygon(closed[:-1])
+    assert prepared.contains((5, 5))
+    assert not prepared.contains((15, 5))
@@ -0,0 +1,112 @@
+import random
+from types import SimpleNamespace
+import pytest
+from src.dao.columnar_layer import ColumnarLayer
+from src.dao.segment_index import MonotoneChainIndex
+from src.dao.spatial_dao import SpatialDAO
+from src.dao.spatial_index import GridIndex, STRTree
+
+
+def make_lines(seed, count, max_points=8, extent=100.0, step=6.0):
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        x, y = rng.uniform(0, extent), rng.uniform(0, extent)
+        points = [(x, y)]
+        for _ in range(rng.randint(1, max_points - 1)):
+            x += rng.uniform(-step, step)
+            y += rng.uniform(-step, step)
+            points.append((x, y))
+        lines.append(points)
+    return lines
+
+
+def make_layer(lines, prefix):
+    shapes = [SimpleNamespace(points=points, parts=[0]) for points in lines]
+    keys = [[f"{prefix}{i}"] for i in range(len(lines))]
+    return ColumnarLayer.from_shapes(3, shapes, keys, ['NUMBER'])
+
+
+def bbox_of(points):
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def boxes_overlap(a, b):
+    return not (a[2] < b[0] or a[0] > b[2] or a[3] < b[1] or a[1] > b[3])
+
+
+def brute_lines_intersect(dao, line1, line2):
+    for p1, p2 in zip(line1, line1[1:]):
+        for p3, p4 in zip(line2, line2[1:]):
+            if dao._segments_intersect(p1, p2, p3, p4):
+                return True
+    return False
+
+
+def brute_join(dao, lines1, lines2):
+    result = {}
+    for i, line1 in enumerate(lines1):
+        hits = [f"v{j}" for j, line2 in enumerate(lines2) if brute_lines_intersect(dao, line1, line2)]
+        if hits:
+            result[f"h{i}"] = hits
+    return result
+
+
+@pytest.mark.parametrize('node_capacity', [2, 4, 16])
+def test_strtree_query_matches_bbox_scan(node_capacity):
+    lines = make_lines(1, 300)
+    boxes = [bbox_of(points) for points in lines]
+    boxes[7] = None
+    tree = STRTree(boxes, node_capacity=node_capacity)
+    assert len(tree) == len(lines) - 1
+    
+    for query in [bbox_of(points) for points in make_lines(2, 50)] + [(-1e9, -1e9, 1e9, 1e9), (500, 500, 600, 600)]:
+        expected = [i for i, box in enumerate(boxes) if box is not None and boxes_overlap(box, query)]
+        assert tree.query(query) == expected
+
+
+def test_strtree_round_trips_through_arrays():
+    boxes = [bbox_of(points) for points in make_lines(3, 120)]
+    tree = STRTree(boxes, node_capacity=4)
+    loaded = STRTree.from_arrays(tree.to_arrays())
+    for query in [bbox_of(points) for points in make_lines(4, 30)]:
+        assert loaded.query(query) == tree.query(query)
+
+
+def test_empty_indexes():
+    assert STRTree([None, None]).query((0, 0, 1, 1)) == []
+    assert GridIndex([None, [(0, 0)]]).query_line([(0, 0), (1, 1)]) == []
+
+
+def test_grid_query_line_is_superset_of_intersections():
+    dao = SpatialDAO()
+    lines = make_lines(5, 200)
+    grid = GridIndex(lines)
+    for query in make_lines(6, 60):
+        candidates = set(grid.query_line(query))
+        for j, line in enumerate(lines):
+            if brute_lines_intersect(dao, query, line):
+                assert j in candidates
+
+
+@pytest.mark.parametrize('use_kernel', [True, False])
+def test_monotone_chain_matches_segment_scan(use_kernel):
+    dao = SpatialDAO(use_kernel=use_kernel)
+    lines = make_lines(7, 80, max_points=30, step=10.0)
+    indexes = [MonotoneChainIndex(points) for points in lines]
+    for i in range(len(lines)):
+        for j in range(i + 1, len(lines)):
+            expected = brute_lines_intersect(dao, lines[i], lines[j])
+            assert indexes[i].intersects(indexes[j], dao._segments_intersect, use_kernel) == expected
+
+
+@pytest.mark.parametrize('engine', ['rtree', 'grid'])
+def test_line_join_matches_brute_force(engine):
+    dao = SpatialDAO()
+    lines1 = make_lines(8, 120)
+    lines2 = make_lines(9, 150)
+    result = dao.batch_line_to_line_analysis(make_layer(lines1, 'h'), make_layer(lines2, 'v'), engine=engine)
+    assert result == brute_join(dao, lines1, lines2)
+    assert result == dao.batch_line_to_line_analysis(make_layer(lines1, 'h'), make_layer(lines2, 'v'), engine='brute')